@@ -1,38 +1,50 @@
 # app/__init__.py
-from flask import Flask, g, redirect, url_for
-from .config import Config
-from .models.database import init_db
-from .models.fornecedor import Fornecedor
+from flask import Flask, g, redirect, request, url_for
+from .config import Config, validar_configuracao
+from .models.database import init_app as init_database
+from .models.migracoes import verificar_schema, init_app as init_migracoes
+from .services.fornecedor_cache import fornecedor_cache
+from .services.render_queue import render_queue
+from .services.share_sync import share_sync
 from .blueprints.fornecedores.routes import fornecedores_bp
 from .blueprints.veiculos.routes import veiculos_bp
-from .utils.logger import setup_logger
+from .utils.logger import setup_logger, init_logging
 import os
 
 logger = setup_logger()
 
-def create_app():
-    """Fábrica da aplicação Flask."""
+def create_app(test_config=None):
+    """Fábrica da aplicação Flask. `test_config` sobrescreve as configurações (ex.: em testes)."""
     app = Flask(__name__)
     app.config.from_object(Config)
     # Configuração do diretório de uploads
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static/uploads/veiculos')
+    if test_config:
+        app.config.update(test_config)
+    validar_configuracao(app.config)
+    init_logging(app)
 
     # Criar diretório de uploads, se não existir
     if not os.path.exists(app.config['UPLOAD_FOLDER']):
         os.makedirs(app.config['UPLOAD_FOLDER'])
 
-    # Inicializar banco de dados
+    # Inicializar banco de dados (conexão por contexto, reaproveitada por thread)
+    init_database(app)
+    init_migracoes(app)
+    render_queue.init_app(app)
+    share_sync.init_app(app)
     with app.app_context():
-        init_db(app)
+        verificar_schema(app)
 
     # Registrar blueprints
     app.register_blueprint(fornecedores_bp, url_prefix='/fornecedores')
     app.register_blueprint(veiculos_bp, url_prefix='/veiculos')
 
-    # Before request para carregar fornecedores
+    # Before request para carregar fornecedores (do cache; arquivos estáticos, miniaturas e a consulta dos portões não precisam)
     @app.before_request
     def load_fornecedores():
-        g.fornecedores = Fornecedor.listar_todos()
+        if request.endpoint not in ('static', 'veiculos.miniatura_foto', 'veiculos.lookup'):
+            g.fornecedores = fornecedor_cache.listar()
 
     # Rota inicial
     @app.route('/')
@@ -3,4 +3,4 @@ from flask import Blueprint
 
 fornecedores_bp = Blueprint('fornecedores', __name__, template_folder='../../templates/fornecedores')
 
-from . import routes
\ No newline at end of file
+from . import routes, commands
\ No newline at end of file
@@ -0,0 +1,12 @@
+# app/blueprints/fornecedores/commands.py
+import click
+from . import fornecedores_bp
+from ...services.bulk_import import ler_planilha, import_fornecedores, resumo_importacao
+
+@fornecedores_bp.cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+def importar_fornecedores_command(arquivo):
+    """Importa fornecedores de uma planilha CSV/XLSX (colunas: nome, pessoa_de_contato, whatsapp)."""
+    resultado = import_fornecedores(ler_planilha(arquivo, arquivo))
+    for mensagem in resumo_importacao(resultado, limite_erros=len(resultado['erros'])):
+        click.echo(mensagem)
@@ -1,5 +1,6 @@
 # app/blueprints/fornecedores/forms.py
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed, FileRequired
 from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired, Length, Optional
 
@@ -7,4 +8,8 @@ class FornecedorForm(FlaskForm):
     nome = StringField('Nome', validators=[DataRequired(), Length(max=255)])
     pessoa_de_contato = StringField('Pessoa de Contato', validators=[Optional(), Length(max=255)])
     whatsapp = StringField('WhatsApp', validators=[Optional(), Length(max=20)])
-    submit = SubmitField('Salvar')
\ No newline at end of file
+    submit = SubmitField('Salvar')
+
+class ImportacaoForm(FlaskForm):
+    arquivo = FileField('Planilha (CSV ou XLSX)', validators=[FileRequired(), FileAllowed(['csv', 'xlsx'], 'Apenas arquivos CSV ou XLSX são permitidos.')])
+    submit = SubmitField('Importar')
\ No newline at end of file
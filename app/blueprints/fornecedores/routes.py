@@ -2,9 +2,11 @@
 from flask import render_template, request, redirect, url_for, flash
 from . import fornecedores_bp
 from ...models.fornecedor import Fornecedor
-from .forms import FornecedorForm
+from .forms import FornecedorForm, ImportacaoForm
 from ...services.id_generator import generate_id
+from ...services.bulk_import import ler_planilha, import_fornecedores, resumo_importacao
 from ...utils.logger import setup_logger
+from ...utils.paginacao import parametros_paginacao
 
 logger = setup_logger()
 
@@ -16,7 +18,8 @@ def index():
 @fornecedores_bp.route('/fornecedores', methods=['GET', 'POST'])
 def listar_fornecedores():
     form = FornecedorForm()
-    fornecedores = Fornecedor.listar_todos()
+    paginacao = parametros_paginacao(request.args)
+    fornecedores, proximo_cursor = Fornecedor.listar_pagina(**paginacao)
     if form.validate_on_submit():
         try:
             # Gerar ID automaticamente
@@ -33,7 +36,27 @@ def listar_fornecedores():
         except Exception as e:
             flash(f'Erro ao cadastrar fornecedor: {str(e)}', 'danger')
             logger.error(f"Erro ao cadastrar fornecedor: {str(e)}")
-    return render_template('index.html', form=form, fornecedores=fornecedores)
+    return render_template('index.html', form=form, fornecedores=fornecedores, proximo_cursor=proximo_cursor,
+                           paginacao=paginacao, form_importacao=ImportacaoForm())
+
+@fornecedores_bp.route('/fornecedores/importar', methods=['POST'])
+def importar_fornecedores():
+    """Importa fornecedores em lote a partir de uma planilha CSV/XLSX."""
+    form = ImportacaoForm()
+    if form.validate_on_submit():
+        try:
+            arquivo = form.arquivo.data
+            resultado = import_fornecedores(ler_planilha(arquivo.stream, arquivo.filename))
+            categoria = 'warning' if resultado['erros'] else 'success'
+            for mensagem in resumo_importacao(resultado):
+                flash(mensagem, categoria)
+        except Exception as e:
+            flash(f'Erro ao importar fornecedores: {str(e)}', 'danger')
+            logger.error(f"Erro ao importar fornecedores: {str(e)}")
+    else:
+        for error in form.arquivo.errors:
+            flash(error, 'danger')
+    return redirect(url_for('fornecedores.listar_fornecedores'))
 
 @fornecedores_bp.route('/fornecedores/editar/<string:id>', methods=['GET', 'POST'])
 def editar_fornecedor(id):
@@ -3,4 +3,4 @@ from flask import Blueprint
 
 veiculos_bp = Blueprint('veiculos', __name__, template_folder='../../templates/veiculos')
 
-from . import routes
\ No newline at end of file
+from . import routes, commands
\ No newline at end of file
@@ -0,0 +1,106 @@
+# app/blueprints/veiculos/commands.py
+import click
+from flask import current_app
+from . import veiculos_bp
+from ...services.bulk_import import ler_planilha, import_veiculos, resumo_importacao
+from ...services.bulk_regeneration import regenerate_all
+from ...services.bulk_status import update_status_bulk
+from ...services.label_generator import generate_batch_labels, iter_vehicles
+from ...services.season_archive import archive_season, is_archived_season
+from ...services.share_sync import share_sync
+
+def _safra_filtro(safra):
+    """Safra dos filtros: a informada, a SAFRA atual por padrão ou nenhuma com 'todas'."""
+    if safra == 'todas':
+        return None
+    return safra or current_app.config.get('SAFRA')
+
+@veiculos_bp.cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+def importar_veiculos_command(arquivo):
+    """Importa veículos de uma planilha CSV/XLSX (colunas: id_fornecedor ou fornecedor, placa, ativo, status)."""
+    try:
+        resultado = import_veiculos(ler_planilha(arquivo, arquivo))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for mensagem in resumo_importacao(resultado, limite_erros=len(resultado['erros'])):
+        click.echo(mensagem)
+
+@veiculos_bp.cli.command('regenerar')
+@click.option('--status', type=click.Choice(['ok', 'bloqueado', 'desligado']), help='Apenas veículos com este status.')
+@click.option('--fornecedor', 'id_fornecedor', help='Apenas veículos deste fornecedor (ID).')
+@click.option('--placa', help='Apenas placas que começam com este prefixo.')
+@click.option('--safra', help="Safra dos veículos (padrão: a SAFRA atual; 'todas' para todas).")
+@click.option('--apenas', type=click.Choice(['imagem', 'pdf']), help='Gera só a imagem ou só o QR-Code/PDF.')
+@click.option('--workers', type=int, default=None, help='Processos em paralelo (padrão: núcleos da máquina).')
+@click.option('--lote', type=int, default=200, show_default=True, help='Veículos lidos por vez (e por checkpoint).')
+@click.option('--reiniciar', is_flag=True, help='Ignora o progresso de uma execução interrompida.')
+@click.option('--forcar', is_flag=True, help='Gera de novo mesmo os artefatos que não mudaram.')
+def regenerar_command(status, id_fornecedor, placa, safra, apenas, workers, lote, reiniciar, forcar):
+    """Regenera imagens, QR-Codes e PDFs de todos os veículos (ou dos filtrados)."""
+    def ao_progredir(processados, total, erros, taxa):
+        click.echo(f"{processados}/{total} veículos ({taxa:.1f}/s), {erros} erro(s)")
+
+    resultado = regenerate_all(
+        filtros={'status': status, 'id_fornecedor': id_fornecedor, 'placa': placa, 'safra': _safra_filtro(safra)},
+        tipos=(apenas,) if apenas else ('imagem', 'pdf'),
+        workers=workers, lote=lote, reiniciar=reiniciar, forcar=forcar, ao_progredir=ao_progredir,
+    )
+    for veiculo_id, erro in resultado['erros']:
+        click.echo(f"Erro no veículo {veiculo_id}: {erro}", err=True)
+    click.echo(f"Concluído: {resultado['processados']} veículo(s) em {resultado['segundos']:.1f}s.")
+
+@veiculos_bp.cli.command('imprimir-lote')
+@click.argument('saida', type=click.Path(dir_okay=False, writable=True))
+@click.option('--id', 'ids', multiple=True, help='ID do veículo (pode repetir). Sem IDs, usa os filtros.')
+@click.option('--status', type=click.Choice(['ok', 'bloqueado', 'desligado']), help='Apenas veículos com este status.')
+@click.option('--fornecedor', 'id_fornecedor', help='Apenas veículos deste fornecedor (ID).')
+@click.option('--safra', help="Safra dos veículos (padrão: a SAFRA atual; 'todas' para todas).")
+def imprimir_lote_command(saida, ids, status, id_fornecedor, safra):
+    """Gera em SAIDA um PDF com as etiquetas de ID dos veículos, 3 por folha A4."""
+    filtros = {'status': status, 'id_fornecedor': id_fornecedor, 'safra': _safra_filtro(safra)}
+    filtros['arquivo'] = is_archived_season(filtros['safra'])
+    try:
+        total = generate_batch_labels(iter_vehicles(ids, filtros), saida)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{total} etiqueta(s) gravada(s) em {saida}.")
+
+@veiculos_bp.cli.command('arquivar')
+@click.argument('safra')
+def arquivar_command(safra):
+    """Move os veículos da SAFRA encerrada para o banco de arquivo (continuam consultáveis)."""
+    try:
+        total = archive_season(safra)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{total} veículo(s) da safra {safra} arquivado(s).")
+
+@veiculos_bp.cli.command('status-lote')
+@click.argument('status', type=click.Choice(['ok', 'bloqueado', 'desligado']))
+@click.option('--id', 'ids', multiple=True, help='ID do veículo (pode repetir). Sem IDs, usa o fornecedor.')
+@click.option('--fornecedor', 'id_fornecedor', help='Todos os veículos deste fornecedor (ID).')
+@click.option('--safra', help="Safra dos veículos do fornecedor (padrão: a SAFRA atual; 'todas' para todas).")
+@click.option('--workers', type=int, default=None, help='Imagens atualizadas em paralelo (padrão: núcleos da máquina).')
+def status_lote_command(status, ids, id_fornecedor, safra, workers):
+    """Altera para STATUS os veículos informados (ou do fornecedor) e atualiza as imagens."""
+    try:
+        resultado = update_status_bulk(status, ids=list(ids), id_fornecedor=id_fornecedor,
+                                       safra=_safra_filtro(safra), workers=workers)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for veiculo_id, erro in resultado['erros']:
+        click.echo(f"Erro no veículo {veiculo_id}: {erro}", err=True)
+    click.echo(f"{resultado['alterados']} veículo(s) alterado(s) ({resultado['faixas']} imagem(ns) atualizada(s) "
+               f"só na faixa de status) em {resultado['segundos']:.1f}s.")
+
+@veiculos_bp.cli.command('sincronizar')
+@click.option('--todos', is_flag=True, help='Tenta também os arquivos que ainda estão aguardando nova tentativa.')
+def sincronizar_command(todos):
+    """Copia para SHARE_IMAGE_DIR as imagens pendentes na fila de compartilhamento."""
+    resultado = share_sync.process(todos=todos)
+    for caminho, erro in resultado['falhas']:
+        click.echo(f"Falha em {caminho}: {erro}", err=True)
+    situacao = share_sync.pending()
+    click.echo(f"{resultado['copiados']} copiado(s), {resultado['iguais']} já atualizado(s); "
+               f"{situacao['pendentes']} pendente(s) na fila ({situacao['com_falha']} com falha).")
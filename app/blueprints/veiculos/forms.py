@@ -3,7 +3,8 @@ from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Length, Optional, Regexp, URL
-from ...models.fornecedor import Fornecedor
+from ...services.fornecedor_cache import fornecedor_cache
+from ..fornecedores.forms import ImportacaoForm  # Mesmo formulário da importação de fornecedores
 
 class VeiculoForm(FlaskForm):
     id_fornecedor = SelectField('Fornecedor', validators=[DataRequired()], coerce=str)
@@ -16,9 +17,18 @@ class VeiculoForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(VeiculoForm, self).__init__(*args, **kwargs)
-        fornecedores = Fornecedor.listar_todos()
-        self.id_fornecedor.choices = [(f.id, f.nome) for f in fornecedores]
+        self.id_fornecedor.choices = fornecedor_cache.opcoes()
 
 class LinkForm(FlaskForm):
     link = StringField('Link', validators=[DataRequired(), URL(message="Por favor, insira um URL válido (ex.: https://exemplo.com).")])
-    submit = SubmitField('Seguir para Impressão')
\ No newline at end of file
+    submit = SubmitField('Seguir para Impressão')
+
+class StatusLoteForm(FlaskForm):
+    id_fornecedor = SelectField('Fornecedor', validators=[Optional()], coerce=str)
+    ids = StringField('IDs dos veículos (separados por vírgula)', validators=[Optional()])
+    status = SelectField('Novo status', validators=[DataRequired()], choices=[('ok', 'Ok'), ('bloqueado', 'Bloqueado'), ('desligado', 'Desligado')])
+    submit = SubmitField('Alterar status')
+
+    def __init__(self, *args, **kwargs):
+        super(StatusLoteForm, self).__init__(*args, **kwargs)
+        self.id_fornecedor.choices = [('', 'Todos os veículos informados')] + fornecedor_cache.opcoes()
@@ -1,53 +1,60 @@
 # app/blueprints/veiculos/routes.py
-from flask import render_template, request, redirect, url_for, flash, current_app
+from flask import render_template, request, redirect, url_for, flash, current_app, jsonify, send_file, abort
 from . import veiculos_bp
 from ...models.veiculo import Veiculo
-from ...models.fornecedor import Fornecedor
-from .forms import VeiculoForm  # Removido LinkForm, pois não é mais necessário
+from .forms import VeiculoForm, ImportacaoForm, StatusLoteForm  # Removido LinkForm, pois não é mais necessário
 from ...services.id_generator import generate_id
-from ...services.image_generator import generate_vehicle_image
+from ...services.render_queue import render_queue
+from ...services.image_generator import image_path, image_is_current
+from ...services.label_generator import label_path, label_is_current, generate_batch_labels, iter_vehicles
+from ...services.photo_ingest import ingest_photo
+from ...services.thumbnails import get_thumbnail, photo_version
+from ...services.season_archive import archived_seasons, is_archived_season
+from ...services.veiculo_index import veiculo_index
+from ...services.bulk_import import ler_planilha, import_veiculos, resumo_importacao
+from ...services.bulk_status import update_status_bulk
 from ...utils.logger import setup_logger
+from ...utils.paginacao import parametros_paginacao
 import os
+import tempfile
 import shutil  # Não é mais necessário, mas mantido para evitar erros em outras partes
 from werkzeug.utils import secure_filename
-import qrcode
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import mm
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.colors import black
 from werkzeug.datastructures import FileStorage  # Importar FileStorage para verificação
 
 logger = setup_logger()
 
+def _filtros_consulta(filtros):
+    """Filtros da listagem como argumentos de `Veiculo.listar_pagina` ('todas' = sem filtro de safra)."""
+    return dict(filtros, safra=None if filtros.get('safra') == 'todas' else filtros.get('safra'))
+
 @veiculos_bp.route('/', methods=['GET', 'POST'])
 def listar_veiculos():
     form = VeiculoForm()
-    veiculos = Veiculo.listar_todos()
+    paginacao = parametros_paginacao(request.args)
+    filtros = {
+        'status': request.args.get('status') or None,
+        'id_fornecedor': request.args.get('id_fornecedor') or None,
+        'placa': request.args.get('placa', '').strip() or None,
+        'ativo': request.args.get('ativo', '').strip() or None,
+        # Padrão: só a safra atual; 'todas' lista as safras do banco principal
+        'safra': request.args.get('safra', current_app.config.get('SAFRA') or 'todas'),
+    }
+    safras, safras_arquivadas = Veiculo.listar_safras(), archived_seasons()
+    # Safras arquivadas são lidas do banco de arquivo, anexado só para esta consulta
+    arquivo = filtros['safra'] in safras_arquivadas and filtros['safra'] not in safras
+    veiculos, proximo_cursor = Veiculo.listar_pagina(**paginacao, **_filtros_consulta(filtros), arquivo=arquivo)
     for veiculo in veiculos:
-        fornecedor = Fornecedor.buscar_por_id(veiculo.id_fornecedor)
-        veiculo.fornecedor_nome = fornecedor.nome if fornecedor else 'Desconhecido'
+        veiculo.fornecedor_nome = veiculo.fornecedor_nome or 'Desconhecido'
     if form.validate_on_submit():
         try:
             id_veiculo = generate_id('veiculos')
-            sequencial = Veiculo.gerar_sequencial()
 
             foto1_filename = None
             foto2_filename = None
             if form.foto1.data:
-                foto = form.foto1.data
-                extensao = os.path.splitext(foto.filename)[1].lower()
-                foto1_filename = secure_filename(f"{form.placa.data}_{form.ativo.data}_1{extensao}")
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], foto1_filename)
-                foto.save(upload_path)
-                logger.info(f"Foto 1 salva em {upload_path}")
+                foto1_filename = ingest_photo(form.foto1.data, f"{form.placa.data}_{form.ativo.data}_1")
             if form.foto2.data:
-                foto = form.foto2.data
-                extensao = os.path.splitext(foto.filename)[1].lower()
-                foto2_filename = secure_filename(f"{form.placa.data}_{form.ativo.data}_2{extensao}")
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], foto2_filename)
-                foto.save(upload_path)
-                logger.info(f"Foto 2 salva em {upload_path}")
+                foto2_filename = ingest_photo(form.foto2.data, f"{form.placa.data}_{form.ativo.data}_2")
 
             veiculo = Veiculo(
                 id=id_veiculo,
@@ -55,24 +62,68 @@ def listar_veiculos():
                 placa=form.placa.data,
                 ativo=form.ativo.data,
                 status=form.status.data,
-                sequencial=sequencial,
                 foto1=foto1_filename,
                 foto2=foto2_filename
             )
             veiculo.salvar()
 
+            # Imagem, QR-Code e PDF são gerados em segundo plano; a página de impressão acompanha
             try:
-                image_path = generate_vehicle_image(veiculo)
-                flash(f'Veículo cadastrado e imagem gerada com sucesso em static/{image_path}!', 'success')
+                render_queue.enqueue(id_veiculo)
+                flash('Veículo cadastrado com sucesso! Imagem e ID de colheita em geração.', 'success')
             except Exception as e:
-                flash(f'Veículo cadastrado, mas erro ao gerar imagem: {str(e)}', 'warning')
-                logger.error(f"Erro ao gerar imagem para veículo {id_veiculo}: {str(e)}")
+                flash(f'Veículo cadastrado, mas erro ao agendar a geração da imagem: {str(e)}', 'warning')
+                logger.error(f"Erro ao agendar imagem para veículo {id_veiculo}: {str(e)}")
 
-            return redirect(url_for('veiculos.gerar_qr_code', id_veiculo=id_veiculo))
+            return redirect(url_for('veiculos.imprimir_id_colheita', id_veiculo=id_veiculo))
         except Exception as e:
             flash(f'Erro ao cadastrar veículo: {str(e)}', 'danger')
             logger.error(f"Erro ao cadastrar veículo: {str(e)}")
-    return render_template('veiculos/index.html', form=form, veiculos=veiculos)
+    return render_template('veiculos/index.html', form=form, veiculos=veiculos, proximo_cursor=proximo_cursor,
+                           paginacao=paginacao, filtros=filtros, form_importacao=ImportacaoForm(),
+                           form_status_lote=StatusLoteForm(),
+                           safras=safras, safras_arquivadas=safras_arquivadas, arquivo=arquivo)
+
+@veiculos_bp.route('/importar', methods=['POST'])
+def importar_veiculos():
+    """Importa veículos em lote a partir de uma planilha CSV/XLSX."""
+    form = ImportacaoForm()
+    if form.validate_on_submit():
+        try:
+            arquivo = form.arquivo.data
+            resultado = import_veiculos(ler_planilha(arquivo.stream, arquivo.filename))
+            categoria = 'warning' if resultado['erros'] else 'success'
+            for mensagem in resumo_importacao(resultado):
+                flash(mensagem, categoria)
+        except Exception as e:
+            flash(f'Erro ao importar veículos: {str(e)}', 'danger')
+            logger.error(f"Erro ao importar veículos: {str(e)}")
+    else:
+        for error in form.arquivo.errors:
+            flash(error, 'danger')
+    return redirect(url_for('veiculos.listar_veiculos'))
+
+@veiculos_bp.route('/status-lote', methods=['POST'])
+def alterar_status_lote():
+    """Bloqueia/libera de uma vez os veículos informados ou todos os do fornecedor (safra atual)."""
+    form = StatusLoteForm()
+    if form.validate_on_submit():
+        ids = [id_.strip() for id_ in (form.ids.data or '').split(',') if id_.strip()]
+        try:
+            resultado = update_status_bulk(form.status.data, ids=ids, id_fornecedor=form.id_fornecedor.data or None,
+                                           safra=current_app.config.get('SAFRA'))
+            flash(f"Status alterado em {resultado['alterados']} veículo(s) em {resultado['segundos']:.1f}s.",
+                  'warning' if resultado['erros'] else 'success')
+            for veiculo_id, erro in resultado['erros'][:10]:
+                flash(f"Erro ao atualizar a imagem do veículo {veiculo_id}: {erro}", 'warning')
+        except Exception as e:
+            flash(f'Erro ao alterar status em lote: {str(e)}', 'danger')
+            logger.error(f"Erro ao alterar status em lote: {str(e)}")
+    else:
+        for campo in form:
+            for error in campo.errors:
+                flash(error, 'danger')
+    return redirect(url_for('veiculos.listar_veiculos'))
 
 @veiculos_bp.route('/gerar-qr-code/<string:id_veiculo>')
 def gerar_qr_code(id_veiculo):
@@ -82,108 +133,146 @@ def gerar_qr_code(id_veiculo):
         return redirect(url_for('veiculos.listar_veiculos'))
 
     try:
-        # Gerar link dinâmico
-        primeira_parte_link = "https://gruposlc.sharepoint.com/sites/FazendaPamplona2/Comum/Forms/AllItems.aspx?viewid=590c476b%2D02f7%2D47d5%2Da27c%2Dc0a689496f9d&id=%2Fsites%2FFazendaPamplona2%2FComum%2FIdColheita2025%2D26%2F"
-        id_veiculo_str = f"veiculo_{veiculo.id}.png"
-        segunda_parte_link = "&parent=%2Fsites%2FFazendaPamplona2%2FComum%2FIdColheita2025%2D26"
-        link_completo = f"{primeira_parte_link}{id_veiculo_str}{segunda_parte_link}"
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(link_completo)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        qr_dir = os.path.join(current_app.config['VEICULO_IMAGE_DIR'], 'qr_codes')
-        os.makedirs(qr_dir, exist_ok=True)
-        qr_filename = f"qr_{id_veiculo}.png"
-        qr_path = os.path.join(qr_dir, qr_filename)
-        img.save(qr_path)
-        logger.info(f"QR-Code salvo em {qr_path}")
-
-        pdf_dir = os.path.join(current_app.config['VEICULO_IMAGE_DIR'], 'pdfs')
-        os.makedirs(pdf_dir, exist_ok=True)
-        pdf_filename = f"id_colheita_{id_veiculo}.pdf"
-        pdf_path = os.path.join(pdf_dir, pdf_filename)
-
-        # Criar o PDF em formato A4
-        c = canvas.Canvas(pdf_path, pagesize=A4)
-        page_width, page_height = A4
-
-        # Dimensões da área de impressão
-        area_width, area_height = 140 * mm, 80 * mm
-
-        # Margens de 20px convertidas para mm (~5.29 mm)
-        px_per_mm = 3.7795
-        margin_mm = 20 / px_per_mm  # ≈ 5.29 mm
-        x_offset = margin_mm * mm
-        y_offset = page_height - area_height - margin_mm * mm
+        render_queue.enqueue(id_veiculo, 'pdf')
+    except Exception as e:
+        flash(f'Erro ao agendar QR-Code ou PDF: {str(e)}', 'danger')
+        logger.error(f"Erro ao agendar QR-Code ou PDF: {str(e)}")
+    return redirect(url_for('veiculos.imprimir_id_colheita', id_veiculo=id_veiculo))
 
-        left_margin = x_offset + 2 * mm  # Margem interna à esquerda da área
-        qr_margin = 2 * px_per_mm / mm
-        qr_size = area_height - 2 * qr_margin * mm
+@veiculos_bp.route('/status-render/<string:id_veiculo>')
+def status_render(id_veiculo):
+    """Situação da geração dos artefatos do veículo, consultada pela página de impressão."""
+    tarefas = render_queue.status(id_veiculo)
+    for tipo in ('imagem', 'pdf'):
+        tarefas.setdefault(tipo, {'status': 'inexistente', 'erro': None})
+    return jsonify(veiculo=id_veiculo, tarefas=tarefas,
+                   pdf_pronto=tarefas['pdf']['status'] == 'concluido',
+                   pdf_url=url_for('veiculos.servir_artefato', tipo='pdf', id_veiculo=id_veiculo))
 
-        # Obter safra
-        safra = current_app.config['SAFRA']
-        safra_text = safra
+@veiculos_bp.route('/lookup')
+def lookup():
+    """
+    Consulta rápida para os portões (leitura do QR-Code ou digitação): veículos por `id`,
+    `placa` e/ou `ativo`, em JSON compacto, a partir do índice em memória.
+    """
+    criterios = {campo: request.args.get(campo, '').strip() or None for campo in ('id', 'placa', 'ativo')}
+    if not any(criterios.values()):
+        return jsonify(erro="Informe id, placa ou ativo."), 400
+    veiculos = veiculo_index.buscar(**criterios)
+    if not veiculos:
+        return jsonify(erro="Veículo não encontrado.", veiculos=[]), 404
+    return jsonify(veiculos=veiculos)
 
-        # Informações
-        lines = [
-            {"text": safra_text, "size": 30, "bold": True},
-            {"text": veiculo.placa, "size": 30, "bold": True},
-            {"text": veiculo.ativo, "size": 30, "bold": True},
-            {"text": f"{veiculo.sequencial:03d}", "size": 42, "bold": True},
-        ]
+@veiculos_bp.route('/imprimir-lote')
+def imprimir_lote():
+    """
+    PDF com as etiquetas de vários veículos (3 por folha A4): os IDs em `ids` (repetido ou
+    separado por vírgulas) ou, sem IDs, os veículos dos filtros `status`, `id_fornecedor` e `safra`
+    (padrão: a SAFRA atual).
+    """
+    ids = [id_.strip() for valor in request.args.getlist('ids') for id_ in valor.split(',') if id_.strip()]
+    filtros = {'status': request.args.get('status'), 'id_fornecedor': request.args.get('id_fornecedor'),
+               'safra': request.args.get('safra', current_app.config.get('SAFRA') or 'todas')}
+    voltar = url_for('veiculos.listar_veiculos', **{k: v for k, v in filtros.items() if v})
+    # O ReportLab mantém todas as páginas na memória até o save() e a resposta só começa com o
+    # PDF pronto: pela web o lote é limitado; lotes maiores são gerados com `flask veiculos imprimir-lote`
+    maximo = current_app.config.get('IMPRESSAO_LOTE_MAXIMO', 300)
+    consulta = dict(_filtros_consulta(filtros), arquivo=is_archived_season(filtros['safra']))
+    quantidade = len(ids) if ids else Veiculo.contar(**consulta)
+    if quantidade > maximo:
+        flash(f"O lote tem {quantidade} veículos; pela web o limite é de {maximo} etiquetas por PDF. "
+              "Filtre por fornecedor ou status, ou use o comando 'flask veiculos imprimir-lote'.", 'warning')
+        return redirect(voltar)
+    # O PDF pronto é gravado em arquivo temporário e enviado em partes; removido ao fechar
+    arquivo = tempfile.TemporaryFile()
+    try:
+        total = generate_batch_labels(iter_vehicles(ids, consulta), arquivo)
+    except Exception as e:
+        arquivo.close()
+        flash(f'Erro ao gerar etiquetas em lote: {str(e)}', 'danger')
+        logger.error(f"Erro ao gerar etiquetas em lote: {str(e)}")
+        return redirect(voltar)
+    arquivo.seek(0)
+    logger.info(f"Etiquetas em lote enviadas: {total} veículo(s).")
+    return send_file(arquivo, mimetype='application/pdf', download_name='ids_colheita.pdf')
 
-        line_spacing = -70
-        start_y = y_offset + area_height - 15 * px_per_mm
-        current_y = start_y
+@veiculos_bp.route('/miniatura/<string:filename>')
+def miniatura_foto(filename):
+    """Miniatura (WebP, ou JPEG se o navegador não aceitar WebP) de uma foto de veículo."""
+    if filename != secure_filename(filename):
+        abort(404)
+    # Só WebP quando pedido explicitamente (accept_mimetypes também casaria com */*)
+    formato = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    miniatura = get_thumbnail(filename, formato)
+    if miniatura is None:
+        abort(404)
+    caminho, etag, mimetype = miniatura
+    response = send_file(caminho, mimetype=mimetype, etag=etag, conditional=True)
+    if request.args.get('v') == photo_version(filename):
+        # URL com a versão atual da foto (ver `url_miniatura`): uma foto nova muda a URL
+        response.cache_control.max_age = current_app.config.get('THUMB_MAX_AGE', 3600)
+    else:
+        response.cache_control.no_cache = True  # URL sem versão (ou antiga): sempre revalidar
+    response.vary.add('Accept')
+    return response
 
-        for line in lines:
-            font = "Helvetica-Bold" if line["bold"] else "Helvetica"
-            c.setFont(font, line["size"])
-            c.setFillColor(black)
-            c.drawString(left_margin, current_y, line["text"])
-            current_y -= line["size"] * px_per_mm + line_spacing
+@veiculos_bp.app_template_global()
+def url_miniatura(filename):
+    """URL da miniatura da foto, com a versão da foto para não reaproveitar a de uma foto substituída."""
+    return url_for('veiculos.miniatura_foto', filename=filename, v=photo_version(filename))
 
-        # QR Code
-        qr_image = ImageReader(qr_path)
-        qr_x = x_offset + area_width - qr_size - qr_margin * mm
-        qr_y = y_offset + qr_margin * mm
-        c.drawImage(qr_image, qr_x, qr_y, width=qr_size, height=qr_size)
+@veiculos_bp.route('/artefato/<any(imagem, pdf):tipo>/<string:id_veiculo>')
+def servir_artefato(tipo, id_veiculo):
+    """
+    Entrega a imagem ou o PDF gerado do veículo, com ETag/Last-Modified (respostas 304) e Range.
 
-        # Borda pontilhada
-        border_margin = 1 * mm
-        c.setLineWidth(0.5)
-        c.setDash(2, 2)
-        c.setStrokeColor(black)
-        c.rect(x_offset + border_margin, y_offset + border_margin,
-               area_width - 2 * border_margin, area_height - 2 * border_margin)
+    Se o arquivo não existir ou estiver desatualizado, a geração é agendada; enquanto um
+    arquivo ausente é gerado, a resposta é 202. Com X_ACCEL_REDIRECT_PREFIX (nginx) ou
+    USE_X_SENDFILE, o envio do arquivo fica a cargo do servidor web.
+    """
+    veiculo = Veiculo.buscar_com_fornecedor(id_veiculo)
+    if veiculo is None:
+        abort(404)
+    if tipo == 'imagem':
+        caminho, atual, mimetype = image_path(id_veiculo), image_is_current, 'image/png'
+    else:
+        caminho, atual, mimetype = label_path(id_veiculo), label_is_current, 'application/pdf'
 
-        c.showPage()
-        c.save()
-        logger.info(f"PDF finalizado no formato A4 com área de 140x80 mm e margem de 20px: {pdf_path}")
+    if not atual(veiculo):
+        render_queue.enqueue(id_veiculo, tipo)  # Sem RENDER_ASSINCRONO, já gera aqui
+        if not os.path.exists(caminho):
+            response = jsonify(veiculo=id_veiculo, tipo=tipo, status='em geração')
+            response.status_code = 202
+            response.headers['Retry-After'] = '2'
+            return response
 
-        return redirect(url_for('veiculos.imprimir_id_colheita', id_veiculo=id_veiculo))
-    except Exception as e:
-        flash(f'Erro ao gerar QR-Code ou PDF: {str(e)}', 'danger')
-        logger.error(f"Erro ao gerar QR-Code ou PDF: {str(e)}")
-        return render_template('veiculos/gerar_qr_code.html', veiculo=veiculo)
+    prefixo = current_app.config.get('X_ACCEL_REDIRECT_PREFIX')
+    if prefixo:
+        relativo = os.path.relpath(caminho, current_app.config['VEICULO_IMAGE_DIR']).replace('\\', '/')
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{prefixo.rstrip('/')}/{relativo}"
+    else:
+        response = send_file(caminho, mimetype=mimetype, conditional=True, etag=True)
+    # O arquivo muda a cada edição do veículo: sempre revalidar (304 quando inalterado)
+    response.cache_control.no_cache = True
+    return response
 
 @veiculos_bp.route('/imprimir/<string:id_veiculo>')
 def imprimir_id_colheita(id_veiculo):
-    veiculo = Veiculo.buscar_por_id(id_veiculo)
+    veiculo = Veiculo.buscar_com_fornecedor(id_veiculo)
     if not veiculo:
         flash('Veículo não encontrado!', 'danger')
         return redirect(url_for('veiculos.listar_veiculos'))
 
-    pdf_filename = f"id_colheita_{id_veiculo}.pdf"
-    pdf_relative_path = os.path.join('output/veiculos/pdfs', pdf_filename).replace('\\', '/')
-    return render_template('veiculos/imprimir.html', veiculo=veiculo, pdf_path=pdf_relative_path)
+    # status() devolve à fila (e despacha) uma tarefa 'executando' de um worker que terminou:
+    # a tarefa 'pendente'/'executando' vista aqui tem quem a execute
+    tarefa_pdf = render_queue.status(id_veiculo).get('pdf')
+    pdf_pendente = tarefa_pdf is not None and tarefa_pdf['status'] in ('pendente', 'executando')
+    if not pdf_pendente and not label_is_current(veiculo):
+        # PDF ausente (ex.: veículo importado em lote) ou desatualizado: agenda agora
+        render_queue.enqueue(id_veiculo, 'pdf')
+        pdf_pendente = not label_is_current(veiculo)
+    return render_template('veiculos/imprimir.html', veiculo=veiculo, pdf_pendente=pdf_pendente)
 
 @veiculos_bp.route('/editar/<string:id>', methods=['GET', 'POST'])
 def editar_veiculo(id):
@@ -198,20 +287,10 @@ def editar_veiculo(id):
             foto2_filename = veiculo.foto2
             # Verificar se uma nova foto foi enviada para foto1
             if form.foto1.data and isinstance(form.foto1.data, FileStorage) and form.foto1.data.filename:
-                foto = form.foto1.data
-                extensao = os.path.splitext(foto.filename)[1].lower()
-                foto1_filename = secure_filename(f"{form.placa.data}_{form.ativo.data}_1{extensao}")
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], foto1_filename)
-                foto.save(upload_path)
-                logger.info(f"Nova foto 1 salva em {upload_path}")
+                foto1_filename = ingest_photo(form.foto1.data, f"{form.placa.data}_{form.ativo.data}_1")
             # Verificar se uma nova foto foi enviada para foto2
             if form.foto2.data and isinstance(form.foto2.data, FileStorage) and form.foto2.data.filename:
-                foto = form.foto2.data
-                extensao = os.path.splitext(foto.filename)[1].lower()
-                foto2_filename = secure_filename(f"{form.placa.data}_{form.ativo.data}_2{extensao}")
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], foto2_filename)
-                foto.save(upload_path)
-                logger.info(f"Nova foto 2 salva em {upload_path}")
+                foto2_filename = ingest_photo(form.foto2.data, f"{form.placa.data}_{form.ativo.data}_2")
 
             veiculo.id_fornecedor = form.id_fornecedor.data
             veiculo.placa = form.placa.data
@@ -221,13 +300,13 @@ def editar_veiculo(id):
             veiculo.foto2 = foto2_filename
             veiculo.atualizar()
 
-            # Regenerar a imagem do veículo com os dados atualizados
+            # Regenerar imagem e PDF com os dados atualizados, em segundo plano
             try:
-                image_path = generate_vehicle_image(veiculo)
-                flash(f'Veículo atualizado e imagem gerada com sucesso em static/{image_path}!', 'success')
+                render_queue.enqueue(veiculo.id)
+                flash('Veículo atualizado com sucesso! Imagem em geração.', 'success')
             except Exception as e:
-                flash(f'Veículo atualizado, mas erro ao gerar imagem: {str(e)}', 'warning')
-                logger.error(f"Erro ao gerar imagem para veículo {id}: {str(e)}")
+                flash(f'Veículo atualizado, mas erro ao agendar a geração da imagem: {str(e)}', 'warning')
+                logger.error(f"Erro ao agendar imagem para veículo {id}: {str(e)}")
 
             return redirect(url_for('veiculos.listar_veiculos'))
         except Exception as e:
@@ -11,20 +11,71 @@ class Config:
     """Configurações da aplicação Flask."""
     SECRET_KEY = os.getenv("SECRET_KEY")
     DATABASE_PATH = os.path.join(basedir, "../app.sqlite3")
+    # Banco das safras arquivadas, anexado só quando consultado (padrão: app-arquivo.sqlite3 ao lado do principal)
+    ARQUIVO_DATABASE_PATH = os.getenv("ARQUIVO_DATABASE_PATH")
+    # Ajustes do SQLite: espera por lock (ms) e cache de páginas (negativo = KiB)
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -16000))
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER")
     SAFRA = os.getenv("SAFRA")
+    # Fontes da imagem do veículo (caminhos ou nomes resolvidos pelo FreeType)
+    FONT_REGULAR_PATH = os.getenv("FONT_REGULAR_PATH", "arial.ttf")
+    FONT_BOLD_PATH = os.getenv("FONT_BOLD_PATH", "arialbd.ttf")
+    # Compressão zlib do PNG gerado (0-9): 3 codifica bem mais rápido que o padrão 6 com tamanho similar
+    PNG_COMPRESS_LEVEL = int(os.getenv("PNG_COMPRESS_LEVEL", 3))
+    # Geração de imagens/PDFs em segundo plano (desative para gerar dentro da requisição)
+    RENDER_ASSINCRONO = os.getenv("RENDER_ASSINCRONO", "1").lower() in ("1", "true", "sim")
+    RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 2))
+    # Fotos enviadas: qualidade do JPEG normalizado e se o arquivo original também é guardado
+    FOTO_QUALIDADE_JPEG = int(os.getenv("FOTO_QUALIDADE_JPEG", 85))
+    FOTO_MANTER_ORIGINAL = os.getenv("FOTO_MANTER_ORIGINAL", "0").lower() in ("1", "true", "sim")
+    # Miniaturas das fotos na listagem: diretório (padrão: static/uploads/miniaturas), limite do cache e validade no navegador
+    THUMB_DIR = os.getenv("THUMB_DIR")
+    THUMB_CACHE_MAX_MB = int(os.getenv("THUMB_CACHE_MAX_MB", 200))
+    THUMB_MAX_AGE = int(os.getenv("THUMB_MAX_AGE", 3600))
+    # Gravar também o PNG do QR-Code em VEICULO_IMAGE_DIR/qr_codes (o PDF é desenhado sem ele)
+    QR_SALVAR_PNG = os.getenv("QR_SALVAR_PNG", "0").lower() in ("1", "true", "sim")
+    # Entrega das imagens/PDFs gerados pelo servidor web: X-Sendfile (Apache/lighttpd) ou,
+    # atrás do nginx, o prefixo de uma location `internal` que aponta para VEICULO_IMAGE_DIR
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "0").lower() in ("1", "true", "sim")
+    X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX")
+    # Máximo de etiquetas por PDF em lote gerado pela web (o PDF é montado inteiro antes da resposta)
+    IMPRESSAO_LOTE_MAXIMO = int(os.getenv("IMPRESSAO_LOTE_MAXIMO", 300))
+    # Log gravado em segundo plano: arquivo, nível, formato ('json' ou 'texto') e limite de
+    # registros DEBUG por segundo de cada linha de código (0 = sem limite)
+    LOG_PATH = os.getenv("LOG_PATH", "idcolheita.log")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMATO = os.getenv("LOG_FORMATO", "json")
+    LOG_DEBUG_POR_SEGUNDO = int(os.getenv("LOG_DEBUG_POR_SEGUNDO", 10))
+    # Numeração sequencial dos veículos: limite e reinício a cada SAFRA. Também limita as
+    # importações: uma planilha com mais veículos do que os números livres é recusada
+    SEQUENCIAL_MAXIMO = int(os.getenv("SEQUENCIAL_MAXIMO", 999))
+    SEQUENCIAL_POR_SAFRA = os.getenv("SEQUENCIAL_POR_SAFRA", "0").lower() in ("1", "true", "sim")
+    # Criar/atualizar as tabelas ao iniciar; por padrão isso é feito com `flask migrar`
+    MIGRAR_AO_INICIAR = os.getenv("MIGRAR_AO_INICIAR", "0").lower() in ("1", "true", "sim")
 
-    # Verificar se OUTPUT_FOLDER está definido
+    # Diretórios de saída (obrigatórios; conferidos em validar_configuracao)
     OUTPUT_FOLDER = os.getenv("OUTPUT_FOLDER")
-    if not OUTPUT_FOLDER:
-        raise ValueError("A variável de ambiente OUTPUT_FOLDER não está definida no .env")
-
-    # Usar diretamente o valor de VEICULO_IMAGE_DIR do .env
     VEICULO_IMAGE_DIR = os.getenv("VEICULO_IMAGE_DIR")
-    if not VEICULO_IMAGE_DIR:
-        raise ValueError("A variável de ambiente VEICULO_IMAGE_DIR não está definida no .env")
-
-    # Adicionar SHARE_IMAGE_DIR do .env
     SHARE_IMAGE_DIR = os.getenv("SHARE_IMAGE_DIR")
-    if not SHARE_IMAGE_DIR:
-        raise ValueError("A variável de ambiente SHARE_IMAGE_DIR não está definida no .env")
\ No newline at end of file
+    # Cópia para SHARE_IMAGE_DIR em segundo plano: arquivos por lote, espera inicial entre tentativas
+    # (dobra a cada falha, até SHARE_SYNC_ESPERA_MAXIMA segundos) e uso de hardlink no mesmo sistema de arquivos
+    SHARE_SYNC_LOTE = int(os.getenv("SHARE_SYNC_LOTE", 50))
+    SHARE_SYNC_ESPERA = int(os.getenv("SHARE_SYNC_ESPERA", 30))
+    SHARE_SYNC_ESPERA_MAXIMA = int(os.getenv("SHARE_SYNC_ESPERA_MAXIMA", 3600))
+    SHARE_SYNC_HARDLINK = os.getenv("SHARE_SYNC_HARDLINK", "1").lower() in ("1", "true", "sim")
+
+# Variáveis que precisam estar definidas no .env
+OBRIGATORIAS = ("OUTPUT_FOLDER", "VEICULO_IMAGE_DIR", "SHARE_IMAGE_DIR")
+
+def validar_configuracao(config):
+    """
+    Confere as variáveis obrigatórias. Chamada em create_app (e não na importação do módulo),
+    para que importar a aplicação ou rodar `flask --help` não dependa do .env.
+
+    Raises:
+        ValueError: Se alguma variável obrigatória não estiver definida.
+    """
+    for nome in OBRIGATORIAS:
+        if not config.get(nome):
+            raise ValueError(f"A variável de ambiente {nome} não está definida no .env")
\ No newline at end of file
@@ -1,56 +1,123 @@
 # app/models/database.py
+import os
 import sqlite3
-from flask import current_app
+import threading
+from contextlib import contextmanager
+from flask import current_app, g
 from ..utils.logger import setup_logger
 
 logger = setup_logger()
 
-def get_db_connection():
-    """Estabelece conexão com o banco de dados SQLite."""
-    try:
-        db_path = current_app.config["DATABASE_PATH"]
-        conn = sqlite3.connect(db_path)
+# Conexões reaproveitadas entre requisições, uma por thread de worker e por arquivo de banco
+_pool = threading.local()
+
+def _configurar_conexao(conn, config):
+    """Aplica os PRAGMAs de desempenho uma única vez por conexão."""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT', 5000))}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    # Valor negativo = tamanho do cache em KiB (ex.: -16000 ≈ 16 MB)
+    conn.execute(f"PRAGMA cache_size = {int(config.get('SQLITE_CACHE_SIZE', -16000))}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+def _obter_conexao_do_pool(db_path, config):
+    """Retorna a conexão da thread atual para o banco informado, criando-a se necessário."""
+    conexoes = getattr(_pool, 'conexoes', None)
+    if conexoes is None:
+        conexoes = _pool.conexoes = {}
+    conn = conexoes.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=config.get('SQLITE_BUSY_TIMEOUT', 5000) / 1000)
         conn.row_factory = sqlite3.Row  # Retornar como dicionário
-        logger.info("Conexão SQLite estabelecida.")
-        return conn
-    except Exception as e:
-        logger.error(f"Erro ao conectar ao SQLite: {str(e)}")
-        raise
+        _configurar_conexao(conn, config)
+        conexoes[db_path] = conn
+        logger.debug(f"Conexão SQLite estabelecida para {db_path}.")
+    return conn
 
-def init_db(app):
-    """Inicializa o banco de dados SQLite e cria as tabelas necessárias."""
-    try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fornecedores (
-                id TEXT PRIMARY KEY,
-                nome TEXT NOT NULL,
-                pessoa_de_contato TEXT,
-                whatsapp TEXT
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS veiculos (
-                id TEXT PRIMARY KEY,
-                id_fornecedor TEXT NOT NULL,
-                placa TEXT NOT NULL,
-                ativo TEXT NOT NULL,
-                status TEXT NOT NULL CHECK(status IN ('ok', 'bloqueado', 'desligado')),
-                sequencial INTEGER NOT NULL,
-                foto1 TEXT,
-                foto2 TEXT,
-                FOREIGN KEY (id_fornecedor) REFERENCES fornecedores(id)
-            )
-        """)
+def get_db_connection():
+    """
+    Retorna a conexão SQLite do contexto atual da aplicação.
+
+    A conexão é guardada em `flask.g` durante o contexto e devolvida ao pool da
+    thread em `close_db`, de modo que requisições seguintes no mesmo worker a reaproveitam.
+    """
+    if 'db' not in g:
+        try:
+            g.db = _obter_conexao_do_pool(current_app.config["DATABASE_PATH"], current_app.config)
+        except Exception as e:
+            logger.error(f"Erro ao conectar ao SQLite: {str(e)}")
+            raise
+    return g.db
+
+@contextmanager
+def transacao_imediata(connection=None):
+    """
+    Executa o bloco dentro de uma transação `BEGIN IMMEDIATE`, confirmando ao final.
 
+    O lock de escrita é obtido já no início, o que serializa leituras seguidas de escrita
+    entre processos (esperando até `busy_timeout`). Se a conexão já estiver em uma
+    transação, o bloco participa dela e a confirmação fica a cargo de quem a abriu.
+    """
+    connection = connection or get_db_connection()
+    if connection.in_transaction:
+        yield connection
+        return
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
         connection.commit()
-        logger.info("Tabelas criadas no SQLite com sucesso.")
-    except Exception as e:
-        logger.error(f"Erro ao inicializar SQLite: {str(e)}")
+    except BaseException:
+        connection.rollback()
         raise
+
+def caminho_arquivo():
+    """Caminho do banco das safras arquivadas (ARQUIVO_DATABASE_PATH ou `<banco>-arquivo.sqlite3`)."""
+    caminho = current_app.config.get('ARQUIVO_DATABASE_PATH')
+    if caminho:
+        return caminho
+    base, extensao = os.path.splitext(current_app.config['DATABASE_PATH'])
+    return f"{base}-arquivo{extensao or '.sqlite3'}"
+
+@contextmanager
+def arquivo_anexado(criar=False):
+    """
+    Anexa o banco das safras arquivadas à conexão atual como o schema `arquivo`.
+
+    O arquivo só é anexado durante o bloco, para que as consultas do dia a dia não paguem
+    por ele. Sem `criar`, produz None se o arquivo ainda não existe. Deve ser usado fora de
+    transações (o SQLite não permite ATTACH/DETACH dentro delas).
+    """
+    connection = get_db_connection()
+    if any(row[1] == 'arquivo' for row in connection.execute("PRAGMA database_list")):
+        yield connection  # Já anexado por um bloco externo
+        return
+    caminho = caminho_arquivo()
+    if not criar and not os.path.exists(caminho):
+        yield None
+        return
+    connection.execute("ATTACH DATABASE ? AS arquivo", (caminho,))
+    try:
+        yield connection
     finally:
-        connection.close()
-        logger.info("Conexão SQLite encerrada.")
+        if connection.in_transaction:
+            connection.rollback()
+        connection.execute("DETACH DATABASE arquivo")
+
+def close_db(e=None):
+    """Devolve a conexão do contexto ao pool, descartando transações não confirmadas."""
+    conn = g.pop('db', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+        logger.warning("Transação SQLite pendente descartada ao encerrar o contexto.")
+
+def close_pool():
+    """Fecha as conexões mantidas pela thread atual (útil em testes e no desligamento)."""
+    conexoes = getattr(_pool, 'conexoes', None) or {}
+    for conn in conexoes.values():
+        conn.close()
+    conexoes.clear()
+
+def init_app(app):
+    """Registra o encerramento da conexão ao final de cada contexto da aplicação."""
+    app.teardown_appcontext(close_db)
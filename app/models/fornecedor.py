@@ -1,12 +1,14 @@
 # app/models/fornecedor.py
 from .database import get_db_connection
+from .geracao import incrementar_geracao
 from ..utils.logger import setup_logger
 
 logger = setup_logger()
 
 class Fornecedor:
     def __init__(self, id, nome, pessoa_de_contato=None, whatsapp=None):
-        self.id = id
+        # ID é INTEGER no banco, mas sempre exposto como texto (AAAAMMDDhhmmXXX)
+        self.id = None if id is None else str(id)
         self.nome = nome
         self.pessoa_de_contato = pessoa_de_contato
         self.whatsapp = whatsapp
@@ -21,14 +23,16 @@ class Fornecedor:
                 VALUES (?, ?, ?, ?)
             """
             cursor.execute(query, (self.id, self.nome, self.pessoa_de_contato, self.whatsapp))
+            incrementar_geracao(cursor, 'fornecedores')
             connection.commit()
             logger.info(f"Fornecedor {self.id} salvo com sucesso.")
         except Exception as e:
+            connection.rollback()
             logger.error(f"Erro ao salvar fornecedor {self.id}: {str(e)}")
             raise
         finally:
-            cursor.close()
-            connection.close()
+            if cursor:
+                cursor.close()
 
     def atualizar(self):
         connection = get_db_connection()
@@ -41,14 +45,16 @@ class Fornecedor:
                 WHERE id = ?
             """
             cursor.execute(query, (self.nome, self.pessoa_de_contato, self.whatsapp, self.id))
+            incrementar_geracao(cursor, 'fornecedores')
             connection.commit()
             logger.info(f"Fornecedor {self.id} atualizado com sucesso.")
         except Exception as e:
+            connection.rollback()
             logger.error(f"Erro ao atualizar fornecedor {self.id}: {str(e)}")
             raise
         finally:
-            cursor.close()
-            connection.close()
+            if cursor:
+                cursor.close()
 
     def deletar(self):
         connection = get_db_connection()
@@ -57,14 +63,16 @@ class Fornecedor:
             cursor = connection.cursor()
             query = "DELETE FROM fornecedores WHERE id = ?"
             cursor.execute(query, (self.id,))
+            incrementar_geracao(cursor, 'fornecedores')
             connection.commit()
             logger.info(f"Fornecedor {self.id} deletado com sucesso.")
         except Exception as e:
+            connection.rollback()
             logger.error(f"Erro ao deletar fornecedor {self.id}: {str(e)}")
             raise
         finally:
-            cursor.close()
-            connection.close()
+            if cursor:
+                cursor.close()
 
     @staticmethod
     def listar_todos():
@@ -79,8 +87,44 @@ class Fornecedor:
             logger.error(f"Erro ao listar fornecedores: {str(e)}")
             raise
         finally:
-            cursor.close()
-            connection.close()
+            if cursor:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(limite=50, cursor=None, ordem='desc'):
+        """
+        Lista uma página de fornecedores usando paginação por cursor sobre o `id`.
+
+        Returns:
+            tuple: (lista de Fornecedor, cursor da próxima página ou None se for a última).
+        """
+        connection = get_db_connection()
+        db_cursor = None
+        try:
+            where = ""
+            parametros = []
+            if cursor:
+                where = "WHERE id < ?" if ordem == 'desc' else "WHERE id > ?"
+                parametros.append(cursor)
+            direcao = "DESC" if ordem == 'desc' else "ASC"
+            db_cursor = connection.cursor()
+            db_cursor.execute(f"""
+                SELECT id, nome, pessoa_de_contato, whatsapp
+                FROM fornecedores
+                {where}
+                ORDER BY id {direcao}
+                LIMIT ?
+            """, (*parametros, limite + 1))
+            linhas = db_cursor.fetchall()
+            fornecedores = [Fornecedor(**f) for f in linhas[:limite]]
+            proximo_cursor = fornecedores[-1].id if len(linhas) > limite else None
+            return fornecedores, proximo_cursor
+        except Exception as e:
+            logger.error(f"Erro ao listar página de fornecedores: {str(e)}")
+            raise
+        finally:
+            if db_cursor:
+                db_cursor.close()
 
     @staticmethod
     def buscar_por_id(id):
@@ -97,5 +141,5 @@ class Fornecedor:
             logger.error(f"Erro ao buscar fornecedor {id}: {str(e)}")
             raise
         finally:
-            cursor.close()
-            connection.close()
\ No newline at end of file
+            if cursor:
+                cursor.close()
\ No newline at end of file
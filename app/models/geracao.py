@@ -0,0 +1,39 @@
+# app/models/geracao.py
+from flask import g
+from .database import get_db_connection
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+def obter_geracao(nome):
+    """
+    Retorna o contador de geração de `nome` (ex.: 'fornecedores').
+
+    O contador é incrementado a cada escrita na tabela correspondente e é compartilhado
+    por todos os processos via SQLite, permitindo que caches em memória detectem
+    alterações feitas por outros workers. O valor é lido no máximo uma vez por contexto.
+    """
+    verificadas = g.setdefault('geracoes', {})
+    if nome not in verificadas:
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT valor FROM geracoes WHERE nome = ?", (nome,))
+            linha = cursor.fetchone()
+            verificadas[nome] = linha[0] if linha else 0
+        except Exception as e:
+            logger.error(f"Erro ao obter geração de {nome}: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+    return verificadas[nome]
+
+def incrementar_geracao(cursor, nome):
+    """Incrementa a geração de `nome` dentro da transação do cursor informado."""
+    cursor.execute("""
+        INSERT INTO geracoes (nome, valor) VALUES (?, 1)
+        ON CONFLICT(nome) DO UPDATE SET valor = valor + 1
+    """, (nome,))
+    g.setdefault('geracoes', {}).pop(nome, None)
@@ -0,0 +1,377 @@
+# app/models/migracoes.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from .database import get_db_connection, transacao_imediata
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Cada migração é (número, descrição, passo). O passo é uma lista de comandos SQL ou uma
+# função que recebe o cursor. As migrações rodam em ordem, cada uma na própria transação,
+# e o número aplicado fica registrado na tabela `schema_version`. Nunca altere uma migração
+# já publicada: acrescente uma nova ao final de MIGRACOES.
+
+def _m001_schema_inicial(cursor):
+    """Tabelas e índices anteriores ao controle de versão (idempotente para bancos existentes)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fornecedores (
+            id TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            pessoa_de_contato TEXT,
+            whatsapp TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS veiculos (
+            id TEXT PRIMARY KEY,
+            id_fornecedor TEXT NOT NULL,
+            placa TEXT NOT NULL,
+            ativo TEXT NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('ok', 'bloqueado', 'desligado')),
+            sequencial INTEGER NOT NULL,
+            foto1 TEXT,
+            foto2 TEXT,
+            FOREIGN KEY (id_fornecedor) REFERENCES fornecedores(id)
+        )
+    """)
+
+    # Índices da listagem paginada: filtros por igualdade seguidos da ordenação por id.
+    # (id_fornecedor, id) também atende o JOIN com fornecedores e a checagem de chave estrangeira.
+    cursor.execute("DROP INDEX IF EXISTS idx_veiculos_id_fornecedor")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_veiculos_fornecedor_id ON veiculos(id_fornecedor, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_veiculos_status_id ON veiculos(status, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_veiculos_placa ON veiculos(placa)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_veiculos_ativo ON veiculos(ativo)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_veiculos_sequencial ON veiculos(sequencial)")
+
+    # Numeração sequencial dos veículos: próximo número por escopo e números devolvidos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sequenciais (
+            escopo TEXT PRIMARY KEY,
+            proximo INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sequenciais_livres (
+            escopo TEXT NOT NULL,
+            numero INTEGER NOT NULL,
+            PRIMARY KEY (escopo, numero)
+        ) WITHOUT ROWID
+    """)
+
+    # Contadores de geração usados para invalidar caches entre processos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS geracoes (
+            nome TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )
+    """)
+
+    # Último sufixo XXX alocado por tabela e minuto (AAAAMMDDhhmm) em generate_id
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS id_contadores (
+            tabela TEXT NOT NULL,
+            prefixo TEXT NOT NULL,
+            ultimo INTEGER NOT NULL,
+            PRIMARY KEY (tabela, prefixo)
+        )
+    """)
+
+    # Fila persistente de geração de imagens/PDFs (ver services/render_queue.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS render_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            veiculo_id TEXT NOT NULL,
+            tipo TEXT NOT NULL CHECK(tipo IN ('imagem', 'pdf')),
+            status TEXT NOT NULL DEFAULT 'pendente' CHECK(status IN ('pendente', 'executando', 'concluido', 'erro')),
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            erro TEXT,
+            criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            atualizado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # No máximo uma tarefa pendente por veículo e tipo (deduplicação)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_render_jobs_pendente
+        ON render_jobs(veiculo_id, tipo) WHERE status = 'pendente'
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_render_jobs_veiculo ON render_jobs(veiculo_id, tipo)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_render_jobs_status ON render_jobs(status)")
+
+    # Ponto de retomada da regeneração em lote (ver services/bulk_regeneration.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS regeneracao_progresso (
+            chave TEXT PRIMARY KEY,
+            ultimo_id TEXT NOT NULL,
+            processados INTEGER NOT NULL,
+            atualizado_em TEXT NOT NULL
+        )
+    """)
+
+    # Hash das entradas de cada artefato gerado, para pular regerações sem mudança
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS render_manifesto (
+            veiculo_id TEXT NOT NULL,
+            artefato TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            atualizado_em TEXT NOT NULL,
+            PRIMARY KEY (veiculo_id, artefato)
+        ) WITHOUT ROWID
+    """)
+
+def _m002_placa_unica(cursor):
+    """Uma placa por veículo; o índice único também atende a busca por prefixo de placa."""
+    cursor.execute("""
+        SELECT placa, COUNT(*) FROM veiculos GROUP BY placa HAVING COUNT(*) > 1 ORDER BY placa LIMIT 20
+    """)
+    duplicadas = cursor.fetchall()
+    if duplicadas:
+        lista = ", ".join(f"{placa} ({quantidade}x)" for placa, quantidade in duplicadas)
+        raise ValueError(f"Há placas repetidas; corrija-as antes de migrar: {lista}")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_veiculos_placa_unica ON veiculos(placa)")
+    cursor.execute("DROP INDEX IF EXISTS idx_veiculos_placa")
+
+def _m003_ids_inteiros(cursor):
+    """
+    IDs AAAAMMDDhhmmXXX de fornecedores e veículos passam de TEXT para INTEGER PRIMARY KEY
+    (o próprio rowid): 8 bytes em vez de 15 por entrada de índice e chave estrangeira, e
+    comparações/junções numéricas. Os modelos continuam expondo os IDs como texto.
+    """
+    for tabela, coluna in (('fornecedores', 'id'), ('veiculos', 'id'), ('veiculos', 'id_fornecedor')):
+        cursor.execute(f"SELECT {coluna} FROM {tabela} WHERE {coluna} = '' OR {coluna} GLOB '*[^0-9]*' LIMIT 5")
+        invalidos = [row[0] for row in cursor.fetchall()]
+        if invalidos:
+            raise ValueError(f"{tabela}.{coluna} tem valores não numéricos: {', '.join(invalidos)}")
+
+    # As novas tabelas apontam uma para a outra; ao renomear fornecedores_novo, o SQLite
+    # atualiza a chave estrangeira de veiculos_novo. As antigas saem sem filhos apontando para elas.
+    cursor.execute("""
+        CREATE TABLE fornecedores_novo (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            pessoa_de_contato TEXT,
+            whatsapp TEXT
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO fornecedores_novo (id, nome, pessoa_de_contato, whatsapp)
+        SELECT CAST(id AS INTEGER), nome, pessoa_de_contato, whatsapp FROM fornecedores
+    """)
+    cursor.execute("""
+        CREATE TABLE veiculos_novo (
+            id INTEGER PRIMARY KEY,
+            id_fornecedor INTEGER NOT NULL,
+            placa TEXT NOT NULL,
+            ativo TEXT NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('ok', 'bloqueado', 'desligado')),
+            sequencial INTEGER NOT NULL,
+            foto1 TEXT,
+            foto2 TEXT,
+            FOREIGN KEY (id_fornecedor) REFERENCES fornecedores_novo(id)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO veiculos_novo (id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2)
+        SELECT CAST(id AS INTEGER), CAST(id_fornecedor AS INTEGER), placa, ativo, status, sequencial, foto1, foto2
+        FROM veiculos
+    """)
+    cursor.execute("DROP TABLE veiculos")
+    cursor.execute("DROP TABLE fornecedores")
+    cursor.execute("ALTER TABLE fornecedores_novo RENAME TO fornecedores")
+    cursor.execute("ALTER TABLE veiculos_novo RENAME TO veiculos")
+
+    cursor.execute("CREATE INDEX idx_veiculos_fornecedor_id ON veiculos(id_fornecedor, id)")
+    cursor.execute("CREATE INDEX idx_veiculos_status_id ON veiculos(status, id)")
+    cursor.execute("CREATE INDEX idx_veiculos_ativo ON veiculos(ativo)")
+    cursor.execute("CREATE INDEX idx_veiculos_sequencial ON veiculos(sequencial)")
+    cursor.execute("CREATE UNIQUE INDEX idx_veiculos_placa_unica ON veiculos(placa)")
+
+    cursor.execute("PRAGMA foreign_key_check")
+    if cursor.fetchone() is not None:
+        raise ValueError("Há veículos com fornecedor inexistente; corrija-os antes de migrar.")
+
+def _m004_safra(cursor):
+    """
+    Coluna `safra` nos veículos, preenchida com a SAFRA configurada para os já cadastrados.
+
+    Os índices da listagem passam a começar pela safra (a consulta padrão é a da safra atual)
+    e a placa fica única dentro de cada safra, já que o mesmo caminhão volta na safra seguinte.
+    """
+    cursor.execute("ALTER TABLE veiculos ADD COLUMN safra TEXT NOT NULL DEFAULT ''")
+    safra = current_app.config.get('SAFRA')
+    if safra:
+        cursor.execute("UPDATE veiculos SET safra = ?", (safra,))
+    cursor.execute("DROP INDEX IF EXISTS idx_veiculos_status_id")
+    cursor.execute("DROP INDEX IF EXISTS idx_veiculos_placa_unica")
+    cursor.execute("CREATE INDEX idx_veiculos_safra_id ON veiculos(safra, id)")
+    cursor.execute("CREATE INDEX idx_veiculos_safra_status_id ON veiculos(safra, status, id)")
+    cursor.execute("CREATE UNIQUE INDEX idx_veiculos_placa_safra ON veiculos(placa, safra)")
+
+# Registro de alterações dos veículos mantido por triggers (ver `services.veiculo_index`):
+# cada escrita em `veiculos`, venha de onde vier, anota o ID alterado. Só as últimas
+# 10000 anotações são mantidas; um índice mais atrasado que isso é recarregado inteiro.
+_M005_REGISTRO_ALTERACOES = [
+    """
+    CREATE TABLE veiculos_alteracoes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        veiculo_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER trg_veiculos_alteracoes_insert AFTER INSERT ON veiculos BEGIN
+        INSERT INTO veiculos_alteracoes (veiculo_id) VALUES (NEW.id);
+        DELETE FROM veiculos_alteracoes WHERE seq <= last_insert_rowid() - 10000;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_veiculos_alteracoes_update AFTER UPDATE ON veiculos BEGIN
+        INSERT INTO veiculos_alteracoes (veiculo_id) VALUES (OLD.id);
+        INSERT INTO veiculos_alteracoes (veiculo_id) SELECT NEW.id WHERE NEW.id <> OLD.id;
+        DELETE FROM veiculos_alteracoes WHERE seq <= last_insert_rowid() - 10000;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_veiculos_alteracoes_delete AFTER DELETE ON veiculos BEGIN
+        INSERT INTO veiculos_alteracoes (veiculo_id) VALUES (OLD.id);
+        DELETE FROM veiculos_alteracoes WHERE seq <= last_insert_rowid() - 10000;
+    END
+    """,
+]
+
+# Fila de cópia dos artefatos para SHARE_IMAGE_DIR (ver `services.share_sync`). Um registro
+# por arquivo; `versao` muda a cada novo pedido, para não descartar um pedido feito durante a cópia.
+_M006_FILA_COMPARTILHAMENTO = [
+    """
+    CREATE TABLE share_sync (
+        caminho TEXT PRIMARY KEY,
+        versao INTEGER NOT NULL DEFAULT 1,
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        proxima_tentativa TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        erro TEXT,
+        criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX idx_share_sync_proxima ON share_sync(proxima_tentativa)",
+]
+
+# Processo que assumiu cada tarefa de renderização ('máquina:PID:token'), para devolver à
+# fila as tarefas de workers que terminaram no meio (ver `services.render_queue`)
+_M007_DONO_RENDER = [
+    "ALTER TABLE render_jobs ADD COLUMN dono TEXT",
+]
+
+# Índice por status de volta (removido na migração 4): a listagem com todas as safras e
+# `regenerar --safra todas --status ...` filtram só pelo status, sem a safra na frente
+_M008_INDICE_STATUS = [
+    "CREATE INDEX IF NOT EXISTS idx_veiculos_status_id ON veiculos(status, id)",
+]
+
+MIGRACOES = [
+    (1, "Schema inicial", _m001_schema_inicial),
+    (2, "Placa única", _m002_placa_unica),
+    (3, "IDs inteiros", _m003_ids_inteiros),
+    (4, "Safra dos veículos", _m004_safra),
+    (5, "Registro de alterações dos veículos", _M005_REGISTRO_ALTERACOES),
+    (6, "Fila de cópia para o compartilhamento", _M006_FILA_COMPARTILHAMENTO),
+    (7, "Dono das tarefas de renderização", _M007_DONO_RENDER),
+    (8, "Índice por status dos veículos", _M008_INDICE_STATUS),
+]
+
+SCHEMA_VERSION = MIGRACOES[-1][0]
+
+def schema_version(connection=None):
+    """Última migração aplicada (0 se o banco ainda não tem a tabela `schema_version`)."""
+    connection = connection or get_db_connection()
+    tabela = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+    if tabela is None:
+        return 0
+    return connection.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+def aplicar_migracoes():
+    """
+    Aplica as migrações pendentes, cada uma em uma transação `BEGIN IMMEDIATE`.
+
+    A versão é relida dentro da transação, então processos executando `flask migrar` ao mesmo
+    tempo não aplicam a mesma migração duas vezes.
+
+    Returns:
+        list: Números das migrações aplicadas.
+    """
+    connection = get_db_connection()
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    connection.commit()
+    aplicadas = []
+    for numero, descricao, passo in MIGRACOES:
+        cursor = None
+        try:
+            with transacao_imediata(connection):
+                if schema_version(connection) >= numero:
+                    continue
+                cursor = connection.cursor()
+                if callable(passo):
+                    passo(cursor)
+                else:
+                    for comando in passo:
+                        cursor.execute(comando)
+                cursor.execute("INSERT INTO schema_version (versao, descricao) VALUES (?, ?)", (numero, descricao))
+            aplicadas.append(numero)
+            logger.info(f"Migração {numero} ({descricao}) aplicada.")
+        except Exception as e:
+            logger.error(f"Erro na migração {numero} ({descricao}): {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+    return aplicadas
+
+def verificar_schema(app):
+    """
+    Confere, na inicialização, se o banco está na versão atual do schema (só leitura, sem DDL).
+
+    Com MIGRAR_AO_INICIAR as migrações pendentes são aplicadas na hora; caso contrário as
+    requisições respondem 503 até que `flask migrar` seja executado.
+    """
+    versao = schema_version()
+    if versao >= SCHEMA_VERSION:
+        app.config['SCHEMA_DESATUALIZADO'] = False
+    elif app.config.get('MIGRAR_AO_INICIAR'):
+        aplicar_migracoes()
+        app.config['SCHEMA_DESATUALIZADO'] = False
+    else:
+        app.config['SCHEMA_DESATUALIZADO'] = True
+        logger.warning(f"Banco na versão {versao} do schema (atual: {SCHEMA_VERSION}); execute 'flask migrar'.")
+
+@click.command('migrar')
+@with_appcontext
+def migrar_command():
+    """Aplica as migrações pendentes do banco SQLite."""
+    try:
+        aplicadas = aplicar_migracoes()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    current_app.config['SCHEMA_DESATUALIZADO'] = False
+    for numero, descricao, _ in MIGRACOES:
+        if numero in aplicadas:
+            click.echo(f"Aplicada: {numero:03d} {descricao}")
+    click.echo(f"Banco de dados na versão {SCHEMA_VERSION} do schema.")
+
+def init_app(app):
+    """Registra o comando `flask migrar` e o bloqueio das requisições com o schema desatualizado."""
+    app.cli.add_command(migrar_command)
+
+    @app.before_request
+    def _exigir_schema_atual():
+        if app.config.get('SCHEMA_DESATUALIZADO'):
+            if schema_version() >= SCHEMA_VERSION:  # Migrado por outro processo
+                app.config['SCHEMA_DESATUALIZADO'] = False
+            else:
+                return "Banco de dados desatualizado: execute 'flask migrar'.", 503
@@ -1,39 +1,87 @@
 # app/models/veiculo.py
-from .database import get_db_connection
+import sqlite3
+from flask import current_app
+from .database import get_db_connection, transacao_imediata, arquivo_anexado
+from ..services.sequence_generator import allocate_sequencial, release_sequencial, sequence_scope
 from ..utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Colunas das consultas ao banco de arquivo (que guarda o nome do fornecedor da época)
+_COLUNAS_ARQUIVO = "id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2, safra, fornecedor_nome"
+
+def _condicoes_filtros(status=None, id_fornecedor=None, placa=None, ativo=None, safra=None):
+    """Monta as condições SQL (sobre o alias `v`) e os parâmetros dos filtros da listagem."""
+    condicoes = []
+    parametros = []
+    if safra:
+        condicoes.append("v.safra = ?")
+        parametros.append(safra)
+    if status:
+        condicoes.append("v.status = ?")
+        parametros.append(status)
+    if id_fornecedor:
+        condicoes.append("v.id_fornecedor = ?")
+        parametros.append(id_fornecedor)
+    if ativo:
+        condicoes.append("v.ativo = ?")
+        parametros.append(ativo)
+    if placa:
+        # Prefixo como intervalo para aproveitar o índice (LIKE ignora o índice por ser case-insensitive)
+        prefixo = placa.upper()
+        condicoes.append("v.placa >= ? AND v.placa < ?")
+        parametros.extend([prefixo, prefixo[:-1] + chr(ord(prefixo[-1]) + 1)])
+    return condicoes, parametros
+
+def _placa_duplicada(erro, placa):
+    """Converte a violação do índice único de placa em um erro legível (ou devolve o erro original)."""
+    if isinstance(erro, sqlite3.IntegrityError) and 'veiculos.placa' in str(erro):
+        return ValueError(f"Já existe um veículo com a placa {placa} nesta safra.")
+    return erro
+
 class Veiculo:
-    def __init__(self, id, id_fornecedor, placa, ativo, status, sequencial, foto1=None, foto2=None):
-        self.id = id
-        self.id_fornecedor = id_fornecedor
+    def __init__(self, id, id_fornecedor, placa, ativo, status, sequencial=None, foto1=None, foto2=None, safra=None,
+                 fornecedor_nome=None):
+        # IDs são INTEGER no banco, mas sempre expostos como texto (AAAAMMDDhhmmXXX)
+        self.id = None if id is None else str(id)
+        self.id_fornecedor = None if id_fornecedor is None else str(id_fornecedor)
         self.placa = placa
         self.ativo = ativo
         self.status = status
         self.sequencial = sequencial
         self.foto1 = foto1
         self.foto2 = foto2
+        self.safra = safra  # Sem valor, o veículo é cadastrado na SAFRA atual
+        self.fornecedor_nome = fornecedor_nome  # Preenchido pelas consultas com JOIN em fornecedores
 
     def salvar(self):
+        """Insere o veículo; sem `sequencial` definido, aloca o menor livre na mesma transação."""
         connection = get_db_connection()
         cursor = None
+        safra = self.safra or current_app.config.get('SAFRA') or ''
         try:
-            cursor = connection.cursor()
-            query = """
-                INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(query, (self.id, self.id_fornecedor, self.placa, self.ativo, self.status, self.sequencial, self.foto1, self.foto2))
-            connection.commit()
+            with transacao_imediata(connection):
+                cursor = connection.cursor()
+                sequencial = self.sequencial
+                if sequencial is None:
+                    sequencial = allocate_sequencial(cursor, sequence_scope(safra))
+                query = """
+                    INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2, safra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                cursor.execute(query, (self.id, self.id_fornecedor, self.placa, self.ativo, self.status, sequencial, self.foto1, self.foto2, safra))
+            self.sequencial = sequencial
+            self.safra = safra
             logger.info(f"Veículo {self.id} salvo com sucesso.")
         except Exception as e:
             logger.error(f"Erro ao salvar veículo {self.id}: {str(e)}")
-            raise
+            erro = _placa_duplicada(e, self.placa)
+            if erro is e:
+                raise
+            raise erro from e
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
 
     def atualizar(self):
         connection = get_db_connection()
@@ -49,21 +97,26 @@ class Veiculo:
             connection.commit()
             logger.info(f"Veículo {self.id} atualizado com sucesso.")
         except Exception as e:
+            connection.rollback()
             logger.error(f"Erro ao atualizar veículo {self.id}: {str(e)}")
-            raise
+            erro = _placa_duplicada(e, self.placa)
+            if erro is e:
+                raise
+            raise erro from e
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
 
     def deletar(self):
+        """Remove o veículo e devolve seu número sequencial para reaproveitamento."""
         connection = get_db_connection()
         cursor = None
         try:
-            cursor = connection.cursor()
-            query = "DELETE FROM veiculos WHERE id = ?"
-            cursor.execute(query, (self.id,))
-            connection.commit()
+            with transacao_imediata(connection):
+                cursor = connection.cursor()
+                query = "DELETE FROM veiculos WHERE id = ?"
+                cursor.execute(query, (self.id,))
+                release_sequencial(cursor, self.sequencial, sequence_scope(self.safra))
             logger.info(f"Veículo {self.id} deletado com sucesso.")
         except Exception as e:
             logger.error(f"Erro ao deletar veículo {self.id}: {str(e)}")
@@ -71,7 +124,53 @@ class Veiculo:
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
+
+    @staticmethod
+    def atualizar_status_em_lote(status, ids=None, id_fornecedor=None, safra=None):
+        """
+        Altera o status de vários veículos em uma única transação: os IDs informados ou, sem
+        eles, todos os do fornecedor (opcionalmente só de uma safra).
+
+        Veículos que já estão no status pedido não são tocados.
+
+        Returns:
+            dict: {ID do veículo: status anterior} dos veículos alterados.
+
+        Raises:
+            ValueError: Se nem IDs nem fornecedor forem informados.
+        """
+        if not ids and not id_fornecedor:
+            raise ValueError("Informe os veículos ou o fornecedor.")
+        if ids:
+            ids = list(dict.fromkeys(ids))
+            blocos = [ids[inicio:inicio + 500] for inicio in range(0, len(ids), 500)]
+            filtros = [(f"id IN ({', '.join('?' * len(bloco))})", bloco) for bloco in blocos]
+        else:
+            condicao, parametros = "id_fornecedor = ?", [id_fornecedor]
+            if safra:
+                condicao, parametros = condicao + " AND safra = ?", parametros + [safra]
+            filtros = [(condicao, parametros)]
+
+        connection = get_db_connection()
+        cursor = None
+        try:
+            alterados = {}
+            with transacao_imediata(connection):
+                cursor = connection.cursor()
+                for condicao, parametros in filtros:
+                    cursor.execute(f"SELECT id, status FROM veiculos WHERE {condicao} AND status <> ?",
+                                   (*parametros, status))
+                    alterados.update((str(row['id']), row['status']) for row in cursor.fetchall())
+                    cursor.execute(f"UPDATE veiculos SET status = ? WHERE {condicao} AND status <> ?",
+                                   (status, *parametros, status))
+            logger.info(f"Status '{status}' aplicado em lote a {len(alterados)} veículo(s).")
+            return alterados
+        except Exception as e:
+            logger.error(f"Erro ao alterar status em lote: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
     @staticmethod
     def listar_todos():
@@ -88,43 +187,244 @@ class Veiculo:
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
 
     @staticmethod
-    def buscar_por_id(id):
+    def listar_com_fornecedor():
+        """Lista os veículos já com o nome do fornecedor, em uma única consulta."""
         connection = get_db_connection()
         cursor = None
         try:
             cursor = connection.cursor()
-            cursor.execute("SELECT * FROM veiculos WHERE id = ?", (id,))
+            cursor.execute("""
+                SELECT v.*, f.nome AS fornecedor_nome
+                FROM veiculos v
+                LEFT JOIN fornecedores f ON f.id = v.id_fornecedor
+            """)
+            veiculos = cursor.fetchall()
+            return [Veiculo(**dict(v)) for v in veiculos]
+        except Exception as e:
+            logger.error(f"Erro ao listar veículos com fornecedor: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(limite=50, cursor=None, ordem='desc', status=None, id_fornecedor=None, placa=None, ativo=None,
+                      safra=None, arquivo=False):
+        """
+        Lista uma página de veículos (com o nome do fornecedor) usando paginação por cursor.
+
+        Os IDs seguem o formato AAAAMMDDhhmmXXX, portanto a ordem por `id` é a ordem de cadastro
+        e o cursor é simplesmente o último ID da página anterior.
+
+        Args:
+            limite: Quantidade máxima de veículos na página.
+            cursor: ID a partir do qual a página começa (exclusivo); None para a primeira página.
+            ordem: 'desc' (mais recentes primeiro) ou 'asc'.
+            status, id_fornecedor, ativo, safra: Filtros por igualdade.
+            placa: Filtro por prefixo da placa.
+            arquivo: Consulta as safras arquivadas (ver `season_archive`) em vez do banco principal.
+
+        Returns:
+            tuple: (lista de Veiculo, cursor da próxima página ou None se for a última).
+        """
+        condicoes, parametros = _condicoes_filtros(status, id_fornecedor, placa, ativo, safra)
+        if cursor:
+            condicoes.append("v.id < ?" if ordem == 'desc' else "v.id > ?")
+            parametros.append(cursor)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        direcao = "DESC" if ordem == 'desc' else "ASC"
+        if arquivo:
+            return Veiculo._listar_pagina_arquivo(limite, where, parametros, direcao)
+
+        connection = get_db_connection()
+        db_cursor = None
+        try:
+            db_cursor = connection.cursor()
+            db_cursor.execute(f"""
+                SELECT v.*, f.nome AS fornecedor_nome
+                FROM veiculos v
+                LEFT JOIN fornecedores f ON f.id = v.id_fornecedor
+                {where}
+                ORDER BY v.id {direcao}
+                LIMIT ?
+            """, (*parametros, limite + 1))
+            linhas = db_cursor.fetchall()
+            veiculos = [Veiculo(**dict(v)) for v in linhas[:limite]]
+            proximo_cursor = veiculos[-1].id if len(linhas) > limite else None
+            return veiculos, proximo_cursor
+        except Exception as e:
+            logger.error(f"Erro ao listar página de veículos: {str(e)}")
+            raise
+        finally:
+            if db_cursor:
+                db_cursor.close()
+
+    @staticmethod
+    def _listar_pagina_arquivo(limite, where, parametros, direcao):
+        """Página de `listar_pagina` lida do banco de arquivo (vazia se nada foi arquivado)."""
+        try:
+            with arquivo_anexado() as connection:
+                if connection is None:
+                    return [], None
+                linhas = connection.execute(f"""
+                    SELECT {_COLUNAS_ARQUIVO} FROM arquivo.veiculos v
+                    {where}
+                    ORDER BY v.id {direcao}
+                    LIMIT ?
+                """, (*parametros, limite + 1)).fetchall()
+            veiculos = [Veiculo(**dict(v)) for v in linhas[:limite]]
+            return veiculos, (veiculos[-1].id if len(linhas) > limite else None)
+        except Exception as e:
+            logger.error(f"Erro ao listar página de veículos arquivados: {str(e)}")
+            raise
+
+    @staticmethod
+    def contar(status=None, id_fornecedor=None, placa=None, ativo=None, safra=None, arquivo=False):
+        """Conta os veículos que atendem aos mesmos filtros de `listar_pagina` (também com `arquivo`)."""
+        condicoes, parametros = _condicoes_filtros(status, id_fornecedor, placa, ativo, safra)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        if arquivo:
+            with arquivo_anexado() as connection:
+                if connection is None:
+                    return 0
+                return connection.execute(f"SELECT COUNT(*) FROM arquivo.veiculos v {where}", parametros).fetchone()[0]
+
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM veiculos v {where}", parametros)
+            return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Erro ao contar veículos: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+    @staticmethod
+    def buscar_com_fornecedor(id):
+        """
+        Busca um veículo pelo ID já com o nome do fornecedor.
+
+        Veículos de safras arquivadas são procurados no banco de arquivo, então continuam
+        podendo ser consultados e reimpressos.
+        """
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT v.*, f.nome AS fornecedor_nome
+                FROM veiculos v
+                LEFT JOIN fornecedores f ON f.id = v.id_fornecedor
+                WHERE v.id = ?
+            """, (id,))
             veiculo = cursor.fetchone()
-            if veiculo:
-                return Veiculo(**dict(veiculo))
-            return None
         except Exception as e:
-            logger.error(f"Erro ao buscar veículo {id}: {str(e)}")
+            logger.error(f"Erro ao buscar veículo {id} com fornecedor: {str(e)}")
             raise
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
+        if veiculo:
+            return Veiculo(**dict(veiculo))
+        return Veiculo.buscar_arquivado(id)
+
+    @staticmethod
+    def buscar_arquivado(id):
+        """Busca um veículo no banco das safras arquivadas (None se não estiver lá)."""
+        with arquivo_anexado() as connection:
+            if connection is None:
+                return None
+            veiculo = connection.execute(f"SELECT {_COLUNAS_ARQUIVO} FROM arquivo.veiculos WHERE id = ?",
+                                         (id,)).fetchone()
+        return Veiculo(**dict(veiculo)) if veiculo else None
 
     @staticmethod
-    def gerar_sequencial():
-        """Gera o próximo número sequencial (1 a 999) com base no maior valor existente."""
+    def listar_safras():
+        """Safras com veículos no banco principal, da mais recente para a mais antiga."""
         connection = get_db_connection()
         cursor = None
         try:
             cursor = connection.cursor()
-            cursor.execute("SELECT MAX(sequencial) FROM veiculos")
-            max_sequencial = cursor.fetchone()[0]
-            if max_sequencial is None:
-                return 1
-            return min(max_sequencial + 1, 999)
+            # DISTINCT sobre o índice (safra, id): um salto por safra, sem ler os veículos
+            cursor.execute("SELECT DISTINCT safra FROM veiculos WHERE safra <> '' ORDER BY safra DESC")
+            return [row[0] for row in cursor.fetchall()]
         except Exception as e:
-            logger.error(f"Erro ao gerar sequencial: {str(e)}")
+            logger.error(f"Erro ao listar safras: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+    @staticmethod
+    def buscar_por_ids(ids):
+        """
+        Busca vários veículos pelo ID, na ordem informada (IDs inexistentes são ignorados).
+
+        Consulta em blocos para não passar do limite de parâmetros do SQLite. Os IDs que não
+        estão no banco principal são procurados no banco das safras arquivadas, como em
+        `buscar_com_fornecedor`.
+        """
+        ids = list(dict.fromkeys(ids))
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            encontrados = {}
+            for inicio in range(0, len(ids), 500):
+                bloco = ids[inicio:inicio + 500]
+                cursor.execute(f"""
+                    SELECT v.*, f.nome AS fornecedor_nome
+                    FROM veiculos v
+                    LEFT JOIN fornecedores f ON f.id = v.id_fornecedor
+                    WHERE v.id IN ({', '.join('?' * len(bloco))})
+                """, bloco)
+                encontrados.update((veiculo.id, veiculo) for veiculo in (Veiculo(**dict(row)) for row in cursor.fetchall()))
+        except Exception as e:
+            logger.error(f"Erro ao buscar veículos por ID: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+        encontrados.update(Veiculo._buscar_arquivados([id_ for id_ in ids if id_ not in encontrados]))
+        return [encontrados[id_] for id_ in ids if id_ in encontrados]
+
+    @staticmethod
+    def _buscar_arquivados(ids):
+        """{id: Veiculo} dos IDs informados que estão no banco de arquivo."""
+        if not ids:
+            return {}
+        with arquivo_anexado() as connection:
+            if connection is None:
+                return {}
+            encontrados = {}
+            for inicio in range(0, len(ids), 500):
+                bloco = ids[inicio:inicio + 500]
+                linhas = connection.execute(f"""
+                    SELECT {_COLUNAS_ARQUIVO} FROM arquivo.veiculos
+                    WHERE id IN ({', '.join('?' * len(bloco))})
+                """, bloco).fetchall()
+                encontrados.update((veiculo.id, veiculo) for veiculo in (Veiculo(**dict(row)) for row in linhas))
+        return encontrados
+
+    @staticmethod
+    def buscar_por_id(id):
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM veiculos WHERE id = ?", (id,))
+            veiculo = cursor.fetchone()
+            if veiculo:
+                return Veiculo(**dict(veiculo))
+            return None
+        except Exception as e:
+            logger.error(f"Erro ao buscar veículo {id}: {str(e)}")
             raise
         finally:
             if cursor:
                 cursor.close()
-            connection.close()
@@ -0,0 +1,74 @@
+# app/services/artifact_store.py
+# Gravação segura dos arquivos gerados (imagens, PDFs, QR-Codes, fotos e miniaturas) com
+# vários workers do Gunicorn e threads de renderização:
+# - `atomic_write` grava em um temporário na mesma pasta e troca com `os.replace`; quem lê
+#   o arquivo (rotas, compartilhamento) vê sempre a versão anterior completa ou a nova.
+# - `vehicle_lock` é um lock consultivo por veículo em arquivo (flock; msvcrt no Windows),
+#   válido entre processos. Os geradores conferem o `render_manifest` já com o lock, então
+#   pedidos simultâneos de renderização do mesmo veículo resultam em uma única renderização
+#   e os demais encontram o artefato pronto.
+import os
+import tempfile
+from contextlib import contextmanager
+from flask import current_app
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _travar(f):
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Tenta por ~10 s antes de falhar
+                return
+            except OSError:
+                continue
+
+    def _destravar(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _travar(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _destravar(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def atomic_write(caminho, modo='wb'):
+    """
+    Abre um arquivo temporário ao lado de `caminho` e, se o bloco terminar sem erro, o coloca
+    no lugar de `caminho` com `os.replace` (atômico no mesmo sistema de arquivos).
+
+    Yields:
+        Arquivo aberto para escrita.
+    """
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=f".{nome}.", suffix='.tmp')
+    try:
+        os.chmod(temporario, 0o644)  # mkstemp cria com 0600; o servidor web e o compartilhamento precisam ler
+        with os.fdopen(fd, modo) as f:
+            yield f
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def _pasta_locks():
+    return os.path.join(current_app.config['VEICULO_IMAGE_DIR'], '.locks')
+
+@contextmanager
+def vehicle_lock(veiculo_id):
+    """Lock exclusivo dos artefatos do veículo, entre threads e processos (bloqueia até obter)."""
+    pasta = _pasta_locks()
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, f"{veiculo_id}.lock"), 'a+b') as f:
+        _travar(f)
+        try:
+            yield
+        finally:
+            _destravar(f)
@@ -0,0 +1,214 @@
+# app/services/bulk_import.py
+import csv
+import io
+import os
+from flask import current_app
+from werkzeug.datastructures import MultiDict
+from ..models.database import get_db_connection, transacao_imediata
+from ..models.geracao import incrementar_geracao
+from .fornecedor_cache import fornecedor_cache
+from .id_generator import generate_ids
+from .sequence_generator import allocate_sequenciais, sequenciais_disponiveis
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+CAMPOS_FORNECEDOR = ('nome', 'pessoa_de_contato', 'whatsapp')
+CAMPOS_VEICULO = ('id_fornecedor', 'placa', 'ativo', 'status')
+
+def ler_planilha(arquivo, nome_arquivo):
+    """
+    Lê as linhas de um arquivo CSV ou XLSX como dicionários (cabeçalhos em minúsculas).
+
+    Args:
+        arquivo: Caminho ou stream binário do arquivo.
+        nome_arquivo: Nome original, usado para identificar o formato pela extensão.
+
+    Returns:
+        list: Dicionários {coluna: valor em texto}, um por linha de dados.
+
+    Raises:
+        ValueError: Se o formato não for suportado ou o suporte a XLSX não estiver instalado.
+    """
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao == '.csv':
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, 'rb') as f:
+                conteudo = f.read()
+        else:
+            conteudo = arquivo.read()
+        texto = conteudo.decode('utf-8-sig')
+        try:
+            dialeto = csv.Sniffer().sniff(texto[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.reader(io.StringIO(texto), dialeto)
+        linhas = list(leitor)
+    elif extensao == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Importação de XLSX requer o pacote openpyxl (pip install openpyxl).")
+        planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+        linhas = [['' if c is None else str(c) for c in row] for row in planilha.iter_rows(values_only=True)]
+    else:
+        raise ValueError("Formato não suportado; envie um arquivo .csv ou .xlsx.")
+
+    if not linhas:
+        return []
+    cabecalho = [c.strip().lower() for c in linhas[0]]
+    return [
+        {coluna: (valor or '').strip() for coluna, valor in zip(cabecalho, linha)}
+        for linha in linhas[1:]
+        if any((valor or '').strip() for valor in linha)
+    ]
+
+def _erros_do_formulario(form):
+    return "; ".join(f"{campo}: {', '.join(mensagens)}" for campo, mensagens in form.errors.items())
+
+def import_fornecedores(linhas):
+    """
+    Valida (regras do FornecedorForm) e insere fornecedores em uma única transação.
+
+    Returns:
+        dict: {'inseridos': quantidade, 'erros': [(número da linha na planilha, mensagem)]}.
+    """
+    # Importado aqui: os blueprints importam este módulo (evita importação circular)
+    from ..blueprints.fornecedores.forms import FornecedorForm
+
+    # Um único formulário reprocessado por linha evita recriar os campos a cada linha
+    form = FornecedorForm(formdata=None, meta={'csrf': False})
+    validos = []
+    erros = []
+    for numero, linha in enumerate(linhas, start=2):
+        form.process(MultiDict(linha))
+        if form.validate():
+            validos.append(tuple(form[campo].data for campo in CAMPOS_FORNECEDOR))
+        else:
+            erros.append((numero, _erros_do_formulario(form)))
+
+    connection = get_db_connection()
+    if validos:
+        try:
+            with transacao_imediata(connection):
+                ids = generate_ids('fornecedores', len(validos))
+                cursor = connection.cursor()
+                cursor.executemany("""
+                    INSERT INTO fornecedores (id, nome, pessoa_de_contato, whatsapp)
+                    VALUES (?, ?, ?, ?)
+                """, [(id_,) + dados for id_, dados in zip(ids, validos)])
+                incrementar_geracao(cursor, 'fornecedores')
+                cursor.close()
+        except Exception as e:
+            logger.error(f"Erro na importação de fornecedores: {str(e)}")
+            raise
+    logger.info(f"Importação de fornecedores: {len(validos)} inseridos, {len(erros)} com erro.")
+    return {'inseridos': len(validos), 'erros': erros}
+
+def _remover_placas_repetidas(connection, validos, linhas_validas, safra):
+    """
+    Separa as linhas cuja placa já está cadastrada na safra ou repete uma linha anterior da planilha.
+
+    Returns:
+        tuple: (válidos restantes, números das linhas restantes, [(número da linha, mensagem)]).
+    """
+    indice_placa = CAMPOS_VEICULO.index('placa')
+    placas = list({dados[indice_placa] for dados in validos})
+    existentes = set()
+    for inicio in range(0, len(placas), 500):
+        bloco = placas[inicio:inicio + 500]
+        existentes.update(row[0] for row in connection.execute(
+            f"SELECT placa FROM veiculos WHERE safra = ? AND placa IN ({', '.join('?' * len(bloco))})",
+            [safra, *bloco]))
+
+    restantes, numeros, erros = [], [], []
+    vistas = {}
+    for dados, numero in zip(validos, linhas_validas):
+        placa = dados[indice_placa]
+        if placa in existentes:
+            erros.append((numero, f"placa: {placa} já está cadastrada."))
+        elif placa in vistas:
+            erros.append((numero, f"placa: {placa} repete a linha {vistas[placa]}."))
+        else:
+            vistas[placa] = numero
+            restantes.append(dados)
+            numeros.append(numero)
+    return restantes, numeros, erros
+
+def import_veiculos(linhas):
+    """
+    Valida (regras do VeiculoForm) e insere veículos em uma única transação.
+
+    O fornecedor pode vir pela coluna `id_fornecedor` ou pelo nome na coluna `fornecedor`.
+    IDs e números sequenciais são alocados em bloco. As imagens não são geradas aqui.
+    Placas já cadastradas ou repetidas na planilha são rejeitadas linha a linha.
+
+    Cada veículo recebe um número sequencial de 1 a SEQUENCIAL_MAXIMO (padrão 999, por safra
+    com SEQUENCIAL_POR_SAFRA): uma planilha com mais veículos válidos do que os números ainda
+    livres é recusada inteira, antes de qualquer inserção.
+
+    Returns:
+        dict: {'inseridos': quantidade, 'erros': [(número da linha na planilha, mensagem)]}.
+
+    Raises:
+        ValueError: Se não houver números sequenciais livres para todos os veículos válidos.
+    """
+    from ..blueprints.veiculos.forms import VeiculoForm
+
+    opcoes = {id_: (id_, nome) for id_, nome in fornecedor_cache.opcoes()}
+    fornecedores_por_nome = {nome.casefold(): id_ for id_, nome in opcoes.values()}
+    form = VeiculoForm(formdata=None, meta={'csrf': False})
+    validos = []
+    linhas_validas = []
+    erros = []
+    for numero, linha in enumerate(linhas, start=2):
+        if not linha.get('id_fornecedor') and linha.get('fornecedor'):
+            linha = dict(linha, id_fornecedor=fornecedores_por_nome.get(linha['fornecedor'].casefold(), ''))
+        # Restringe as escolhas ao fornecedor da linha: a validação do SelectField fica O(1)
+        opcao = opcoes.get(linha.get('id_fornecedor'))
+        form.id_fornecedor.choices = [opcao] if opcao else []
+        form.process(MultiDict(linha))
+        if form.validate():
+            validos.append(tuple(form[campo].data for campo in CAMPOS_VEICULO))
+            linhas_validas.append(numero)
+        else:
+            erros.append((numero, _erros_do_formulario(form)))
+
+    connection = get_db_connection()
+    safra = current_app.config.get('SAFRA') or ''
+    repetidas = []
+    if validos:
+        try:
+            with transacao_imediata(connection):
+                # Placas conferidas já com o lock de escrita: ninguém cadastra a mesma placa até o INSERT
+                validos, linhas_validas, repetidas = _remover_placas_repetidas(connection, validos, linhas_validas, safra)
+                cursor = connection.cursor()
+                disponiveis = sequenciais_disponiveis(cursor)
+                if len(validos) > disponiveis:
+                    raise ValueError(
+                        f"A planilha tem {len(validos)} veículo(s) válido(s), mas restam apenas {disponiveis} "
+                        f"número(s) sequencial(is) livre(s) (limite SEQUENCIAL_MAXIMO = "
+                        f"{current_app.config.get('SEQUENCIAL_MAXIMO', 999)}). Divida a planilha ou aumente o limite.")
+                if validos:
+                    ids = generate_ids('veiculos', len(validos))
+                    sequenciais = allocate_sequenciais(cursor, len(validos))
+                    cursor.executemany("""
+                        INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, safra)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, [(id_,) + dados + (seq, safra) for id_, dados, seq in zip(ids, validos, sequenciais)])
+                cursor.close()
+        except Exception as e:
+            logger.error(f"Erro na importação de veículos: {str(e)}")
+            raise
+    erros = sorted(erros + repetidas)
+    logger.info(f"Importação de veículos: {len(validos)} inseridos, {len(erros)} com erro.")
+    return {'inseridos': len(validos), 'erros': erros}
+
+def resumo_importacao(resultado, limite_erros=10):
+    """Mensagens legíveis do resultado de uma importação (para flash ou terminal)."""
+    mensagens = [f"{resultado['inseridos']} registro(s) importado(s), {len(resultado['erros'])} linha(s) com erro."]
+    for numero, erro in resultado['erros'][:limite_erros]:
+        mensagens.append(f"Linha {numero}: {erro}")
+    if len(resultado['erros']) > limite_erros:
+        mensagens.append(f"... e mais {len(resultado['erros']) - limite_erros} linha(s) com erro.")
+    return mensagens
@@ -0,0 +1,131 @@
+# app/services/bulk_regeneration.py
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from ..models.database import get_db_connection
+from ..models.veiculo import Veiculo
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Aplicação de cada processo do pool (criada em _inicializar_worker)
+_app_worker = None
+
+def _inicializar_worker(config):
+    global _app_worker
+    from .. import create_app
+    _app_worker = create_app(config)
+
+def _regenerar_veiculo(veiculo_id, tipos, forcar=False):
+    """Executado nos processos do pool. Retorna (veiculo_id, mensagem de erro ou None)."""
+    from .image_generator import generate_vehicle_image
+    from .label_generator import generate_id_label
+
+    with _app_worker.app_context():
+        try:
+            veiculo = Veiculo.buscar_com_fornecedor(veiculo_id)
+            if veiculo is None:
+                return veiculo_id, "Veículo não encontrado"
+            if 'imagem' in tipos:
+                generate_vehicle_image(veiculo, force=forcar)
+            if 'pdf' in tipos:
+                generate_id_label(veiculo, force=forcar)
+            return veiculo_id, None
+        except Exception as e:
+            return veiculo_id, str(e)
+
+def _config_para_workers():
+    """Configuração da aplicação atual que pode ser repassada aos processos filhos."""
+    simples = (str, int, float, bool, type(None))
+    config = {k: v for k, v in current_app.config.items() if k.isupper() and isinstance(v, simples)}
+    config['RENDER_ASSINCRONO'] = False
+    return config
+
+def _chave_progresso(filtros, tipos, forcar):
+    # `forcar` faz parte da chave: uma execução forçada não pode continuar o progresso de uma
+    # normal (pularia veículos sem forçá-los), nem o contrário
+    conteudo = json.dumps({'filtros': filtros, 'tipos': sorted(tipos), 'forcar': bool(forcar)}, sort_keys=True)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+def _ler_progresso(chave):
+    connection = get_db_connection()
+    linha = connection.execute("SELECT ultimo_id, processados FROM regeneracao_progresso WHERE chave = ?",
+                               (chave,)).fetchone()
+    return (linha['ultimo_id'], linha['processados']) if linha else (None, 0)
+
+def _gravar_progresso(chave, ultimo_id, processados):
+    connection = get_db_connection()
+    if ultimo_id is None:
+        connection.execute("DELETE FROM regeneracao_progresso WHERE chave = ?", (chave,))
+    else:
+        connection.execute("""
+            INSERT INTO regeneracao_progresso (chave, ultimo_id, processados, atualizado_em)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(chave) DO UPDATE SET ultimo_id = excluded.ultimo_id, processados = excluded.processados,
+                                             atualizado_em = CURRENT_TIMESTAMP
+        """, (chave, ultimo_id, processados))
+    connection.commit()
+
+def regenerate_all(filtros=None, tipos=('imagem', 'pdf'), workers=None, lote=200, reiniciar=False, forcar=False,
+                   ao_progredir=None):
+    """
+    Regenera imagens e/ou QR-Codes/PDFs dos veículos em paralelo, retomando de onde parou.
+
+    Os veículos são lidos do banco em páginas (por ID crescente), sem carregar a tabela inteira,
+    e cada página é distribuída a um pool de processos (um por núcleo, por padrão). Ao final de
+    cada página o último ID é gravado em `regeneracao_progresso`; uma nova execução com os mesmos
+    filtros, tipos e `forcar` continua a partir dele, a menos que `reiniciar` seja verdadeiro.
+
+    Args:
+        filtros: Filtros de `Veiculo.listar_pagina` (status, id_fornecedor, placa, ativo).
+        tipos: Artefatos a gerar ('imagem' e/ou 'pdf').
+        workers: Quantidade de processos (padrão: os.cpu_count()).
+        lote: Veículos por página/checkpoint.
+        reiniciar: Ignora o progresso gravado.
+        forcar: Gera de novo mesmo os artefatos cujas entradas não mudaram (ver `render_manifest`).
+        ao_progredir: Função chamada após cada página com (processados, total, erros, veículos por segundo).
+
+    Returns:
+        dict: {'processados', 'erros': [(veiculo_id, mensagem)], 'segundos'}.
+    """
+    filtros = {k: v for k, v in (filtros or {}).items() if v}
+    chave = _chave_progresso(filtros, tipos, forcar)
+    cursor, processados = (None, 0) if reiniciar else _ler_progresso(chave)
+    if cursor:
+        logger.info(f"Retomando regeneração em lote após o veículo {cursor} ({processados} já processados).")
+    total = Veiculo.contar(**filtros)
+    erros = []
+    inicio = time.perf_counter()
+    processados_agora = 0
+
+    contexto = multiprocessing.get_context('spawn')  # Processos limpos, sem conexões SQLite herdadas
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=contexto,
+                             initializer=_inicializar_worker, initargs=(_config_para_workers(),)) as executor:
+        while True:
+            veiculos, proximo_cursor = Veiculo.listar_pagina(limite=lote, cursor=cursor, ordem='asc', **filtros)
+            if not veiculos:
+                break
+            for veiculo_id, erro in executor.map(_regenerar_veiculo, [v.id for v in veiculos],
+                                                 [tuple(tipos)] * len(veiculos),
+                                                 [forcar] * len(veiculos)):
+                if erro:
+                    erros.append((veiculo_id, erro))
+                    logger.error(f"Erro ao regenerar veículo {veiculo_id}: {erro}")
+            processados += len(veiculos)
+            processados_agora += len(veiculos)
+            cursor = veiculos[-1].id
+            _gravar_progresso(chave, cursor, processados)
+            if ao_progredir:
+                taxa = processados_agora / max(time.perf_counter() - inicio, 1e-9)
+                ao_progredir(processados, total, len(erros), taxa)
+            if proximo_cursor is None:
+                break
+
+    _gravar_progresso(chave, None, 0)
+    segundos = time.perf_counter() - inicio
+    logger.info(f"Regeneração em lote concluída: {processados_agora} veículos em {segundos:.1f}s, {len(erros)} erro(s).")
+    return {'processados': processados_agora, 'erros': erros, 'segundos': segundos}
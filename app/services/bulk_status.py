@@ -0,0 +1,58 @@
+# app/services/bulk_status.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from ..models.veiculo import Veiculo
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+def _atualizar_imagem(app, veiculo, status_anterior):
+    """Executado nas threads do pool. Retorna (veiculo_id, faixa trocada?, mensagem de erro ou None)."""
+    from .image_generator import update_status_banner
+
+    with app.app_context():
+        try:
+            return veiculo.id, update_status_banner(veiculo, status_anterior), None
+        except Exception as e:
+            return veiculo.id, False, str(e)
+
+def update_status_bulk(status, ids=None, id_fornecedor=None, safra=None, workers=None):
+    """
+    Bloqueia/libera vários veículos de uma vez e atualiza as imagens deles.
+
+    O status é gravado por `Veiculo.atualizar_status_em_lote` (uma transação). Em seguida, as
+    imagens são atualizadas em um pool de threads (a decodificação e a compressão do PNG
+    liberam o GIL): para cada veículo, só a faixa de status é redesenhada sobre a imagem
+    existente (ver `update_status_banner`). Os PDFs não mostram o status e não mudam.
+
+    Args:
+        status: Novo status ('ok', 'bloqueado' ou 'desligado').
+        ids: IDs dos veículos; sem eles, todos os do fornecedor `id_fornecedor`.
+        safra: Com `id_fornecedor`, limita aos veículos desta safra.
+        workers: Threads em paralelo (padrão: os.cpu_count()).
+
+    Returns:
+        dict: {'alterados', 'faixas' (imagens atualizadas só na faixa), 'erros': [(veiculo_id, mensagem)], 'segundos'}.
+    """
+    inicio = time.perf_counter()
+    anteriores = Veiculo.atualizar_status_em_lote(status, ids=ids, id_fornecedor=id_fornecedor, safra=safra)
+    veiculos = Veiculo.buscar_por_ids(list(anteriores))
+
+    faixas, erros = 0, []
+    if veiculos:
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count(), thread_name_prefix='status') as executor:
+            for veiculo_id, so_faixa, erro in executor.map(_atualizar_imagem, [app] * len(veiculos), veiculos,
+                                                          [anteriores[v.id] for v in veiculos]):
+                if erro:
+                    erros.append((veiculo_id, erro))
+                    logger.error(f"Erro ao atualizar a imagem do veículo {veiculo_id}: {erro}")
+                elif so_faixa:
+                    faixas += 1
+
+    segundos = time.perf_counter() - inicio
+    logger.info(f"Status '{status}' em lote: {len(anteriores)} veículo(s), {faixas} imagem(ns) atualizada(s) "
+                f"só na faixa, {len(erros)} erro(s), {segundos:.1f}s.")
+    return {'alterados': len(anteriores), 'faixas': faixas, 'erros': erros, 'segundos': segundos}
@@ -0,0 +1,57 @@
+# app/services/fornecedor_cache.py
+import threading
+from flask import current_app
+from ..models.fornecedor import Fornecedor
+from ..models.geracao import obter_geracao
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+class FornecedorCache:
+    """
+    Cache em memória dos fornecedores, compartilhado pelas threads do processo.
+
+    A validade é conferida pela geração 'fornecedores' no SQLite (ver `models.geracao`),
+    incrementada por `Fornecedor.salvar/atualizar/deletar`; assim, alterações feitas por
+    qualquer worker invalidam o cache de todos na próxima consulta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estados = {}  # DATABASE_PATH -> (geracao, por_id, ordenados, opcoes)
+
+    def _estado(self):
+        db_path = current_app.config['DATABASE_PATH']
+        geracao = obter_geracao('fornecedores')
+        estado = self._estados.get(db_path)
+        if estado is not None and estado[0] == geracao:
+            return estado
+        with self._lock:
+            estado = self._estados.get(db_path)
+            if estado is None or estado[0] != geracao:
+                fornecedores = sorted(Fornecedor.listar_todos(), key=lambda f: (f.nome or '').casefold())
+                por_id = {f.id: f for f in fornecedores}
+                opcoes = [(f.id, f.nome) for f in fornecedores]
+                estado = (geracao, por_id, fornecedores, opcoes)
+                self._estados[db_path] = estado
+                logger.info(f"Cache de fornecedores recarregado (geração {geracao}, {len(fornecedores)} registros).")
+        return estado
+
+    def obter(self, id):
+        """Retorna o Fornecedor com o ID informado, ou None."""
+        return self._estado()[1].get(id)
+
+    def listar(self):
+        """Retorna todos os fornecedores ordenados por nome."""
+        return self._estado()[2]
+
+    def opcoes(self):
+        """Retorna a lista de escolhas (id, nome) ordenada por nome, para campos de seleção."""
+        return self._estado()[3]
+
+    def invalidar(self):
+        """Descarta o cache de todos os bancos neste processo."""
+        with self._lock:
+            self._estados.clear()
+
+fornecedor_cache = FornecedorCache()
@@ -1,45 +1,116 @@
 # app/services/id_generator.py
-from datetime import datetime
-from ..models.database import get_db_connection
+from datetime import datetime, timedelta
+from ..models.database import get_db_connection, transacao_imediata
 from ..utils.logger import setup_logger
 
 logger = setup_logger()
 
+TABELAS_COM_ID = ('fornecedores', 'veiculos')
+SUFIXO_MAXIMO = 999
+
+def _reservar_sufixos(cursor, table_name, prefix, quantidade, prefixo_atual):
+    """
+    Reserva até `quantidade` sufixos consecutivos para o prefixo na tabela de contadores.
+
+    Deve ser chamada dentro de uma transação com lock de escrita. Na primeira alocação de um
+    prefixo o contador parte do maior ID já existente nele (compatível com IDs criados antes
+    do contador) e são descartados os contadores de minutos anteriores a `prefixo_atual` (o
+    minuto da alocação). Os do minuto atual e dos seguintes, já reservados por um lote,
+    precisam ser mantidos.
+
+    Returns:
+        tuple: (primeiro sufixo reservado, quantidade reservada); quantidade 0 se o prefixo se esgotou.
+    """
+    # IDs são inteiros AAAAMMDDhhmmXXX: o minuto é um intervalo do rowid e o sufixo, o resto por 1000
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO id_contadores (tabela, prefixo, ultimo)
+        SELECT ?, ?, COALESCE(MAX(id) % 1000, -1)
+        FROM {table_name}
+        WHERE id BETWEEN ? AND ?
+    """, (table_name, prefix, int(f"{prefix}000"), int(f"{prefix}{SUFIXO_MAXIMO}")))
+    if cursor.rowcount == 1:
+        cursor.execute("DELETE FROM id_contadores WHERE tabela = ? AND prefixo < ?", (table_name, prefixo_atual))
+
+    cursor.execute("SELECT ultimo FROM id_contadores WHERE tabela = ? AND prefixo = ?", (table_name, prefix))
+    ultimo = cursor.fetchone()[0]
+    reservados = min(quantidade, SUFIXO_MAXIMO - ultimo)
+    if reservados <= 0:
+        return None, 0
+    cursor.execute("UPDATE id_contadores SET ultimo = ? WHERE tabela = ? AND prefixo = ?",
+                   (ultimo + reservados, table_name, prefix))
+    return ultimo + 1, reservados
+
+def _reservar_ids(cursor, table_name, quantidade, date):
+    """
+    Reserva `quantidade` IDs a partir do minuto de `date`; quando os 1000 sufixos de um minuto
+    se esgotam (inclusive por reservas anteriores de um lote), continua nos minutos seguintes.
+    """
+    prefixo_atual = date.strftime("%Y%m%d%H%M")
+    ids = []
+    while len(ids) < quantidade:
+        prefix = date.strftime("%Y%m%d%H%M")
+        sufixo, reservados = _reservar_sufixos(cursor, table_name, prefix, quantidade - len(ids), prefixo_atual)
+        ids.extend(f"{prefix}{s:03d}" for s in range(sufixo or 0, (sufixo or 0) + reservados))
+        date += timedelta(minutes=1)
+    return ids
+
 def generate_id(table_name, date=None):
     """
     Gera um ID único no formato AAAAMMDDhhmmXXX para a tabela especificada.
     - table_name: Nome da tabela ('fornecedores' ou 'veiculos').
     - date: Objeto datetime para testes (padrão: datetime.now()).
     - Retorna: String no formato AAAAMMDDhhmmXXX.
+
+    A alocação usa um contador por minuto atualizado em `BEGIN IMMEDIATE`, em tempo constante
+    e sem duplicidade entre threads e processos. Se o minuto estiver esgotado, o ID é do
+    primeiro minuto seguinte com sufixos livres.
     """
+    if table_name not in TABELAS_COM_ID:
+        raise ValueError(f"Tabela inválida para geração de ID: {table_name}")
     if date is None:
         date = datetime.now()
-    
-    # Formato do prefixo: AAAAMMDDhhmm
-    prefix = date.strftime("%Y%m%d%H%M")
-    
-    # Conectar ao banco
+
     connection = get_db_connection()
+    cursor = None
     try:
-        cursor = connection.cursor()
-        
-        # Buscar IDs existentes com o mesmo prefixo
-        query = f"SELECT id FROM {table_name} WHERE id LIKE ?"
-        cursor.execute(query, (f"{prefix}%",))
-        existing_ids = {row[0] for row in cursor.fetchall()}
-        
-        # Tentar números sequenciais de 000 a 999
-        for seq in range(1000):
-            id_candidate = f"{prefix}{seq:03d}"
-            if id_candidate not in existing_ids:
-                logger.info(f"ID gerado: {id_candidate} para {table_name}")
-                return id_candidate
-        
-        raise Exception("Não há IDs disponíveis para o período atual.")
-    
+        with transacao_imediata(connection):
+            cursor = connection.cursor()
+            id_gerado = _reservar_ids(cursor, table_name, 1, date)[0]
+        logger.info(f"ID gerado: {id_gerado} para {table_name}")
+        return id_gerado
     except Exception as e:
         logger.error(f"Erro ao gerar ID para {table_name}: {str(e)}")
         raise
     finally:
-        cursor.close()
-        connection.close()
\ No newline at end of file
+        if cursor:
+            cursor.close()
+
+def generate_ids(table_name, quantidade, date=None):
+    """
+    Gera `quantidade` IDs únicos de uma vez, para cadastros em lote.
+
+    Reserva blocos de sufixos por minuto; quando os 1000 sufixos de um minuto se esgotam, a
+    reserva continua nos minutos seguintes. Participa da transação em andamento, se houver.
+
+    Returns:
+        list: IDs no formato AAAAMMDDhhmmXXX, em ordem crescente.
+    """
+    if table_name not in TABELAS_COM_ID:
+        raise ValueError(f"Tabela inválida para geração de ID: {table_name}")
+    if date is None:
+        date = datetime.now()
+
+    connection = get_db_connection()
+    cursor = None
+    try:
+        with transacao_imediata(connection):
+            cursor = connection.cursor()
+            ids = _reservar_ids(cursor, table_name, quantidade, date)
+        logger.info(f"{len(ids)} IDs gerados para {table_name} ({ids[0] if ids else '-'} a {ids[-1] if ids else '-'})")
+        return ids
+    except Exception as e:
+        logger.error(f"Erro ao gerar IDs em lote para {table_name}: {str(e)}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
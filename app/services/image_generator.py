@@ -1,113 +1,143 @@
 # app/services/image_generator.py
-from PIL import Image, ImageDraw, ImageFont
+# O Pillow é importado dentro das funções: carregar este módulo (rotas, CLI) não custa nada
+import copy
 import os
-import shutil  # Adicionado para copiar a imagem
+import threading
 from flask import current_app
 from ..utils.logger import setup_logger
-from ..models.fornecedor import Fornecedor
+from ..models.veiculo import Veiculo
+from .artifact_store import atomic_write, vehicle_lock
+from .render_manifest import compute_hash, file_digest, is_current, record
+from .share_sync import share_sync
 
 logger = setup_logger()
 
-def generate_vehicle_image(vehicle):
-    """
-    Gera uma imagem PNG (9:16) com informações do veículo, ajustada para máxima legibilidade.
+# Incrementar a cada mudança visual do layout: invalida as imagens já geradas
+LAYOUT_VERSION = 1
 
-    Args:
-        vehicle: Instância de Veiculo com id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2.
+# Layout da imagem (9:16, 1080x1920)
+LARGURA, ALTURA = 1080, 1920
+X_MARGEM = 40  # Margem lateral
+ESPACAMENTO = 20  # Espaçamento entre linhas de texto
+ALTURA_CABECALHO = 100  # Altura do fundo do cabeçalho
+ALTURA_STATUS = 80  # Altura do fundo do status
+Y_STATUS = ALTURA_CABECALHO + ESPACAMENTO
+COR_VERDE = (0, 113, 70)
+COR_VERMELHA = (255, 0, 0)
+TEXTO_CABECALHO = "IDENTIFICADOR DE VEÍCULOS DA COLHEITA"
 
-    Returns:
-        str: Caminho relativo do arquivo da imagem gerada (ex.: 'output/veiculos/veiculo_<id>.png').
+def _carregar_fonte(caminho, tamanho):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype(caminho, tamanho)
+    except IOError:
+        logger.warning(f"Fonte {caminho} não encontrada; usando fonte padrão")
+        return ImageFont.load_default()
 
-    Raises:
-        ValueError: Se as configurações ou arquivos necessários estiverem ausentes.
-        Exception: Para outros erros durante a geração da imagem.
+def status_text(status):
+    """Texto exibido na faixa de status."""
+    return "LIBERADO" if status == "ok" else status.upper()
+
+class VehicleImageRenderer:
     """
-    try:
-        # Validar configurações
-        if not current_app.config.get('VEICULO_IMAGE_DIR'):
-            raise ValueError("VEICULO_IMAGE_DIR não configurado")
-        if not current_app.config.get('UPLOAD_FOLDER'):
-            raise ValueError("UPLOAD_FOLDER não configurado")
-        if not current_app.config.get('SAFRA'):
-            raise ValueError("SAFRA não configurado")
-        if not current_app.config.get('SHARE_IMAGE_DIR'):
-            raise ValueError("SHARE_IMAGE_DIR não configurado")
+    Renderizador da imagem do veículo.
 
-        # Configurações da imagem (9:16, 1080x1920)
-        width, height = 1080, 1920
-        image = Image.new('RGB', (width, height), 'white')
-        draw = ImageDraw.Draw(image)
+    As fontes são carregadas uma única vez e, para cada status, mantém-se uma imagem base
+    com o cabeçalho e a faixa de status já desenhados; cada renderização copia a base e
+    desenha apenas os dados do veículo e as fotos.
+    """
+
+    def __init__(self, font_regular_path='arial.ttf', font_bold_path='arialbd.ttf'):
+        self.font_regular = _carregar_fonte(font_regular_path, 60)
+        self.font_bold = _carregar_fonte(font_bold_path, 60)
+        self.font_bold_header = _carregar_fonte(font_bold_path, 40)  # Tamanho reduzido para 40 (30% de 60)
+        from PIL import Image, ImageDraw
+        medidor = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        self._largura_placa = medidor.textlength("Placa: ", font=self.font_regular)
+        self._largura_ativo = medidor.textlength("Ativo: ", font=self.font_regular)
+        self._bases = {}
+        self._faixas = {}
+        self._lock = threading.Lock()
+
+    def status_banner(self, status):
+        """Retorna a faixa de status pré-renderizada (LARGURA x ALTURA_STATUS)."""
+        faixa = self._faixas.get(status)
+        if faixa is None:
+            from PIL import Image, ImageDraw
+            faixa = Image.new('RGB', (LARGURA, ALTURA_STATUS), COR_VERDE if status == "ok" else COR_VERMELHA)
+            ImageDraw.Draw(faixa).text((LARGURA // 2, ALTURA_STATUS // 2), status_text(status), fill='white',
+                                       font=self.font_bold, anchor="mm")
+            with self._lock:
+                faixa = self._faixas.setdefault(status, faixa)
+        return faixa
+
+    def _base(self, status):
+        base = self._bases.get(status)
+        if base is None:
+            from PIL import Image, ImageDraw
+            base = Image.new('RGB', (LARGURA, ALTURA), 'white')
+            draw = ImageDraw.Draw(base)
+            # 1. Cabeçalho: "IDENTIFICADOR DE VEÍCULOS DA COLHEITA"
+            draw.rectangle((0, 0, LARGURA, ALTURA_CABECALHO), fill=COR_VERDE)  # Fundo verde
+            draw.text((LARGURA // 2, ALTURA_CABECALHO // 2), TEXTO_CABECALHO, fill='white',
+                      font=self.font_bold_header, anchor="mm")  # Texto centralizado com fonte reduzida
+            # 2. Status com fundo colorido
+            base.paste(self.status_banner(status), (0, Y_STATUS))
+            with self._lock:
+                base = self._bases.setdefault(status, base)
+        return base
+
+    def render(self, vehicle, fornecedor_nome, photo_paths=()):
+        """
+        Desenha a imagem do veículo.
 
-        # Carregar fontes (regular e negrito)
-        try:
-            font_regular = ImageFont.truetype('arial.ttf', 60)
-            font_bold = ImageFont.truetype('arialbd.ttf', 60)
-            font_bold_header = ImageFont.truetype('arialbd.ttf', 40)  # Tamanho reduzido para 40 (30% de 60)
-        except IOError:
-            font_regular = ImageFont.load_default()
-            font_bold = ImageFont.load_default()
-            font_bold_header = ImageFont.load_default()
-            logger.warning("Fontes arial.ttf ou arialbd.ttf não encontradas; usando fonte padrão")
-
-        # Margens e posições iniciais
-        x_margin = 40  # Margem lateral
-        y_position = 20  # Início do topo
-        line_spacing = 20  # Espaçamento entre linhas de texto
-
-        # 1. Cabeçalho: "IDENTIFICADOR DE VEÍCULOS DA COLHEITA"
-        header_text = "IDENTIFICADOR DE VEÍCULOS DA COLHEITA"
-        header_height = 100  # Altura do fundo do cabeçalho
-        draw.rectangle((0, 0, width, header_height), fill=(0, 113, 70))  # Fundo verde
-        draw.text((width // 2, header_height // 2), header_text, fill='white', font=font_bold_header, anchor="mm")  # Texto centralizado com fonte reduzida
-        y_position = header_height + line_spacing
-
-        # 2. Status com fundo colorido
-        status_text = "LIBERADO" if vehicle.status == "ok" else vehicle.status.upper()
-        status_color = (0, 113, 70) if vehicle.status == "ok" else (255, 0, 0)  # Verde ou vermelho
-        status_height = 80  # Altura do fundo do status
-        draw.rectangle((0, y_position, width, y_position + status_height), fill=status_color)
-        draw.text((width // 2, y_position + status_height // 2), status_text, fill='white', font=font_bold, anchor="mm")
-        y_position += status_height + line_spacing
+        Args:
+            vehicle: Instância de Veiculo.
+            fornecedor_nome: Nome do fornecedor (None se desconhecido).
+            photo_paths: Caminhos completos de foto1 e foto2 (None para foto ausente).
+
+        Returns:
+            PIL.Image.Image: Imagem RGB 1080x1920.
+        """
+        from PIL import Image, ImageDraw
+        image = self._base(vehicle.status).copy()
+        draw = ImageDraw.Draw(image)
+        y_position = Y_STATUS + ALTURA_STATUS + ESPACAMENTO
 
         # 3. Placa: "Placa: RPX1F19"
-        placa_text = f"Placa: {vehicle.placa.upper()}"
-        draw.text((x_margin, y_position), "Placa: ", fill='black', font=font_regular)
-        placa_x = x_margin + draw.textlength("Placa: ", font=font_regular)
-        draw.text((placa_x, y_position), vehicle.placa.upper(), fill='black', font=font_bold)
-        y_position += 80 + line_spacing
+        draw.text((X_MARGEM, y_position), "Placa: ", fill='black', font=self.font_regular)
+        draw.text((X_MARGEM + self._largura_placa, y_position), vehicle.placa.upper(), fill='black', font=self.font_bold)
+        y_position += 80 + ESPACAMENTO
 
         # 4. Ativo: "Ativo: 2630"
-        ativo_text = f"Ativo: {vehicle.ativo}"
-        draw.text((x_margin, y_position), "Ativo: ", fill='black', font=font_regular)
-        ativo_x = x_margin + draw.textlength("Ativo: ", font=font_regular)
-        draw.text((ativo_x, y_position), str(vehicle.ativo), fill='black', font=font_bold)
-        y_position += 80 + line_spacing
+        draw.text((X_MARGEM, y_position), "Ativo: ", fill='black', font=self.font_regular)
+        draw.text((X_MARGEM + self._largura_ativo, y_position), str(vehicle.ativo), fill='black', font=self.font_bold)
+        y_position += 80 + ESPACAMENTO
 
         # 5. Fornecedor: "CONFIANÇA CHUPINHA"
-        fornecedor = Fornecedor.buscar_por_id(vehicle.id_fornecedor)
-        fornecedor_nome = fornecedor.nome.upper() if fornecedor else 'DESCONHECIDO'
-        draw.text((x_margin, y_position), fornecedor_nome, fill='black', font=font_bold)
-        y_position += 80 + line_spacing
+        draw.text((X_MARGEM, y_position), fornecedor_nome.upper() if fornecedor_nome else 'DESCONHECIDO',
+                  fill='black', font=self.font_bold)
+        y_position += 80 + ESPACAMENTO
 
         # 6. Sequencial: "Nº 001"
-        sequencial_text = f"Nº {vehicle.sequencial:03d}"
-        draw.text((x_margin, y_position), sequencial_text, fill='black', font=font_bold)
-        y_position += 80 + line_spacing
+        draw.text((X_MARGEM, y_position), f"Nº {vehicle.sequencial:03d}", fill='black', font=self.font_bold)
+        y_position += 80 + ESPACAMENTO
 
         # 7. Adicionar fotos (alinhadas à esquerda, 3px de espaço)
         photo_width, photo_height = 1080, 720
         total_photo_height = photo_height * 2 + 3  # 3px de espaço entre fotos
-        if y_position + total_photo_height > height:
-            logger.warning(f"Espaço insuficiente para ambas as fotos em {vehicle.id}; ajustando layout")
-            photo_height = (height - y_position - 3) // 2  # Dividir espaço restante
+        if y_position + total_photo_height > ALTURA:  # Sempre ocorre com o layout atual
+            photo_height = (ALTURA - y_position - 3) // 2  # Dividir espaço restante
             photo_width = int((photo_height / 720) * 1080)  # Manter proporção 3:2
 
-        for idx, photo in enumerate([vehicle.foto1, vehicle.foto2], 1):
-            if photo:
-                photo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], photo)
+        for idx, photo_path in enumerate((list(photo_paths) + [None, None])[:2], 1):
+            if photo_path:
                 if os.path.exists(photo_path):
                     try:
-                        img = Image.open(photo_path).convert('RGB')
+                        img = Image.open(photo_path)
+                        # Fotos antigas, gravadas sem normalização: decodificar JPEG já reduzido
+                        img.draft('RGB', (photo_width, photo_height))
+                        img = img.convert('RGB')
                         # Manter proporção 3:2, ajustando para largura máxima
                         img_ratio = img.width / img.height
                         if img_ratio > 1.5:  # Ajustar se a imagem for mais larga
@@ -115,52 +145,180 @@ def generate_vehicle_image(vehicle):
                         else:
                             img = img.resize((int(photo_height * img_ratio), photo_height), Image.Resampling.LANCZOS)
                         # Alinhar à esquerda
-                        paste_x = x_margin
-                        image.paste(img, (paste_x, y_position))
+                        image.paste(img, (X_MARGEM, y_position))
                         y_position += img.height + 3  # Espaçamento de 3px
                     except Exception as e:
                         logger.error(f"Erro ao processar foto {idx} do veículo {vehicle.id}: {str(e)}")
-                        draw.text((x_margin, y_position), f"Erro na Foto {idx}", fill='red', font=font_regular)
+                        draw.text((X_MARGEM, y_position), f"Erro na Foto {idx}", fill='red', font=self.font_regular)
                         y_position += 80
                 else:
                     logger.warning(f"Foto {photo_path} não encontrada para veículo {vehicle.id}")
-                    draw.text((x_margin, y_position), f"Foto {idx} Não Encontrada", fill='black', font=font_regular)
+                    draw.text((X_MARGEM, y_position), f"Foto {idx} Não Encontrada", fill='black', font=self.font_regular)
                     y_position += 80
             else:
-                draw.text((x_margin, y_position), f"Sem Foto {idx}", fill='black', font=font_regular)
+                draw.text((X_MARGEM, y_position), f"Sem Foto {idx}", fill='black', font=self.font_regular)
                 y_position += 80
 
-        # 8. Adicionar borda preta de 3px ao redor da imagem
-        draw.rectangle((0, 0, width - 1, height - 1), outline='black', width=3)
+        # 8. Adicionar borda preta de 3px ao redor da imagem (por último, sobre as fotos)
+        draw.rectangle((0, 0, LARGURA - 1, ALTURA - 1), outline='black', width=3)
+        return image
 
-        # Criar diretório de saída, se não existir
-        output_dir = current_app.config['VEICULO_IMAGE_DIR']
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            logger.info(f"Diretório de saída criado: {output_dir}")
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+def get_renderer():
+    """Retorna o renderizador do processo para as fontes configuradas (FONT_REGULAR_PATH/FONT_BOLD_PATH)."""
+    fontes = (current_app.config.get('FONT_REGULAR_PATH') or 'arial.ttf',
+              current_app.config.get('FONT_BOLD_PATH') or 'arialbd.ttf')
+    renderer = _renderers.get(fontes)
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get(fontes)
+            if renderer is None:
+                renderer = _renderers[fontes] = VehicleImageRenderer(*fontes)
+    return renderer
+
+def image_inputs_hash(vehicle, fornecedor_nome, photo_paths):
+    """Hash de tudo o que determina a imagem do veículo (dados, fotos, fontes e layout)."""
+    return compute_hash({
+        'layout': LAYOUT_VERSION,
+        'placa': vehicle.placa,
+        'ativo': vehicle.ativo,
+        'status': vehicle.status,
+        'sequencial': vehicle.sequencial,
+        'fornecedor': fornecedor_nome,
+        'fotos': [file_digest(p) for p in photo_paths],
+        'safra': getattr(vehicle, 'safra', None) or current_app.config.get('SAFRA'),
+        'fontes': [current_app.config.get('FONT_REGULAR_PATH'), current_app.config.get('FONT_BOLD_PATH')],
+    })
+
+def _photo_paths(vehicle):
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    return [os.path.join(upload_folder, foto) if foto else None for foto in (vehicle.foto1, vehicle.foto2)]
+
+def image_path(vehicle_id):
+    """Caminho completo da imagem gerada para o veículo."""
+    return os.path.join(current_app.config['VEICULO_IMAGE_DIR'], f"veiculo_{vehicle_id}.png")
+
+def image_is_current(vehicle):
+    """Indica se a imagem existente corresponde aos dados atuais (veículo com `fornecedor_nome`)."""
+    hash_entradas = image_inputs_hash(vehicle, vehicle.fornecedor_nome, _photo_paths(vehicle))
+    return is_current(vehicle.id, 'imagem', hash_entradas, image_path(vehicle.id))
+
+def update_status_banner(vehicle, status_anterior):
+    """
+    Atualiza a imagem do veículo após uma troca de status redesenhando só a faixa de status.
+
+    Se a imagem existente foi gerada com os dados atuais e o status anterior (conferido pelo
+    `render_manifest`), a faixa pré-renderizada do novo status é colada sobre ela e a borda
+    refeita, sem reprocessar as fotos nem o texto. Caso contrário a imagem é gerada por completo.
+
+    Args:
+        vehicle: Veiculo já com o novo status e com `fornecedor_nome`.
+        status_anterior: Status com que a imagem existente foi gerada.
+
+    Returns:
+        bool: True se só a faixa foi trocada; False se a imagem foi gerada por completo.
+    """
+    from PIL import Image, ImageDraw
+    output_path = image_path(vehicle.id)
+    photo_paths = _photo_paths(vehicle)
+    anterior = copy.copy(vehicle)
+    anterior.status = status_anterior
+
+    try:
+        with vehicle_lock(vehicle.id):
+            if not is_current(vehicle.id, 'imagem', image_inputs_hash(anterior, vehicle.fornecedor_nome, photo_paths),
+                              output_path):
+                atualizada = False
+            else:
+                image = Image.open(output_path)
+                image.load()  # Lê o PNG inteiro e fecha o arquivo
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                image.paste(get_renderer().status_banner(vehicle.status), (0, Y_STATUS))
+                ImageDraw.Draw(image).rectangle((0, 0, LARGURA - 1, ALTURA - 1), outline='black', width=3)
+                with atomic_write(output_path) as f:
+                    image.save(f, 'PNG', compress_level=current_app.config.get('PNG_COMPRESS_LEVEL', 3))
+                record(vehicle.id, 'imagem', image_inputs_hash(vehicle, vehicle.fornecedor_nome, photo_paths))
+                atualizada = True
+    except Exception as e:
+        logger.error(f"Erro ao atualizar a faixa de status do veículo {vehicle.id}: {str(e)}")
+        raise
+    if not atualizada:
+        # Fora do lock: a geração completa o obtém de novo (e nada faz se outro worker já a gerou)
+        generate_vehicle_image(vehicle)
+        return False
+    share_sync.enqueue(output_path)
+    logger.info(f"Faixa de status da imagem do veículo {vehicle.id} atualizada para '{vehicle.status}'.")
+    return True
+
+def generate_vehicle_image(vehicle, force=False):
+    """
+    Gera uma imagem PNG (9:16) com informações do veículo, ajustada para máxima legibilidade.
+
+    Se a imagem existente foi gerada com as mesmas entradas (ver `render_manifest`), nada é
+    renderizado nem copiado, a menos que `force` seja verdadeiro.
+
+    Args:
+        vehicle: Instância de Veiculo com id, id_fornecedor, placa, ativo, status, sequencial, foto1, foto2.
+        force: Gera mesmo que as entradas não tenham mudado.
+
+    Returns:
+        str: Caminho relativo do arquivo da imagem gerada (ex.: 'output/veiculos/veiculo_<id>.png').
+
+    Raises:
+        ValueError: Se as configurações ou arquivos necessários estiverem ausentes.
+        Exception: Para outros erros durante a geração da imagem.
+    """
+    try:
+        # Validar configurações
+        if not current_app.config.get('VEICULO_IMAGE_DIR'):
+            raise ValueError("VEICULO_IMAGE_DIR não configurado")
+        if not current_app.config.get('UPLOAD_FOLDER'):
+            raise ValueError("UPLOAD_FOLDER não configurado")
+        if not current_app.config.get('SAFRA'):
+            raise ValueError("SAFRA não configurado")
+        if not current_app.config.get('SHARE_IMAGE_DIR'):
+            raise ValueError("SHARE_IMAGE_DIR não configurado")
+
+        fornecedor_nome = getattr(vehicle, 'fornecedor_nome', None)
+        if fornecedor_nome is None:
+            veiculo_com_fornecedor = Veiculo.buscar_com_fornecedor(vehicle.id)
+            fornecedor_nome = veiculo_com_fornecedor.fornecedor_nome if veiculo_com_fornecedor else None
 
-        # Salvar imagem
+        photo_paths = _photo_paths(vehicle)
+
+        output_dir = current_app.config['VEICULO_IMAGE_DIR']
         filename = f"veiculo_{vehicle.id}.png"
-        output_path = os.path.join(output_dir, filename)
-        image.save(output_path, 'PNG')
-        logger.info(f"Imagem gerada para veículo {vehicle.id} em {output_path}")
-
-        # Copiar a imagem para SHARE_IMAGE_DIR
-        try:
-            share_dir = current_app.config['SHARE_IMAGE_DIR']
-            if not os.path.exists(share_dir):
-                os.makedirs(share_dir, exist_ok=True)
-                logger.info(f"Diretório de compartilhamento criado: {share_dir}")
-
-            share_path = os.path.join(share_dir, filename)
-            shutil.copy2(output_path, share_path)
-            logger.info(f"Imagem copiada para {share_path}")
-        except Exception as e:
-            logger.error(f"Erro ao copiar imagem para {share_dir}: {str(e)}")
-            raise
+        output_path = image_path(vehicle.id)
+        relative_path = os.path.join('output/veiculos', filename).replace('\\', '/')
+
+        hash_entradas = image_inputs_hash(vehicle, fornecedor_nome, photo_paths)
+        # Com o lock do veículo, renderizações simultâneas viram uma só: as seguintes
+        # encontram a imagem já gerada pelas mesmas entradas e terminam aqui
+        with vehicle_lock(vehicle.id):
+            if not force and is_current(vehicle.id, 'imagem', hash_entradas, output_path):
+                logger.info(f"Imagem do veículo {vehicle.id} inalterada; geração ignorada.")
+                return relative_path
+
+            image = get_renderer().render(vehicle, fornecedor_nome, photo_paths)
+
+            # Criar diretório de saída, se não existir
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+                logger.info(f"Diretório de saída criado: {output_dir}")
+
+            # Salvar imagem (temporário + os.replace: leitores nunca veem o PNG pela metade)
+            with atomic_write(output_path) as f:
+                image.save(f, 'PNG', compress_level=current_app.config.get('PNG_COMPRESS_LEVEL', 3))
+            logger.info(f"Imagem gerada para veículo {vehicle.id} em {output_path}")
+
+            record(vehicle.id, 'imagem', hash_entradas)
+        # A cópia para SHARE_IMAGE_DIR fica na fila: um compartilhamento lento não atrasa a geração
+        share_sync.enqueue(output_path)
 
         # Retornar caminho relativo para uso em templates ou mensagens
-        relative_path = os.path.join('output/veiculos', filename).replace('\\', '/')
         return relative_path
 
     except ValueError as ve:
@@ -168,4 +326,4 @@ def generate_vehicle_image(vehicle):
         raise
     except Exception as e:
         logger.error(f"Erro ao gerar imagem para veículo {vehicle.id}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,259 @@
+# app/services/label_generator.py
+# qrcode, ReportLab e Pillow são importados dentro das funções: carregar este módulo
+# (rotas, CLI) não custa nada
+import os
+from flask import current_app
+from ..models.veiculo import Veiculo
+from ..utils.logger import setup_logger
+from .artifact_store import atomic_write, vehicle_lock
+from .render_manifest import compute_hash, is_current, record
+
+logger = setup_logger()
+
+# Incrementar a cada mudança visual da etiqueta: invalida os PDFs já gerados
+LAYOUT_VERSION = 2
+
+# Mesmos valores de reportlab.lib.units.mm e reportlab.lib.pagesizes.A4 (em pontos)
+mm = 72 / 25.4
+A4 = (210 * mm, 297 * mm)
+
+# Dimensões da área de impressão de cada etiqueta
+AREA_LARGURA, AREA_ALTURA = 140 * mm, 80 * mm
+# Margens de 20px convertidas para mm (~5.29 mm)
+PX_POR_MM = 3.7795
+MARGEM = 20 / PX_POR_MM * mm
+# Etiquetas empilhadas em uma página A4 na impressão em lote
+ETIQUETAS_POR_PAGINA = 3
+
+def build_share_link(veiculo):
+    """Link do SharePoint para a imagem do veículo, codificado no QR-Code."""
+    primeira_parte_link = "https://gruposlc.sharepoint.com/sites/FazendaPamplona2/Comum/Forms/AllItems.aspx?viewid=590c476b%2D02f7%2D47d5%2Da27c%2Dc0a689496f9d&id=%2Fsites%2FFazendaPamplona2%2FComum%2FIdColheita2025%2D26%2F"
+    id_veiculo_str = f"veiculo_{veiculo.id}.png"
+    segunda_parte_link = "&parent=%2Fsites%2FFazendaPamplona2%2FComum%2FIdColheita2025%2D26"
+    return f"{primeira_parte_link}{id_veiculo_str}{segunda_parte_link}"
+
+def build_qr_matrix(veiculo):
+    """Matriz do QR-Code do link do veículo (linhas de booleanos, já com a borda de 4 módulos)."""
+    import qrcode
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(build_share_link(veiculo))
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+def draw_qr_matrix(c, matriz, x, y, tamanho):
+    """
+    Desenha a matriz do QR-Code no canvas como retângulos vetoriais (nítido em qualquer escala).
+
+    Módulos pretos consecutivos de uma linha viram um único retângulo.
+    """
+    from reportlab.lib.colors import black, white
+    modulo = tamanho / len(matriz)
+    c.saveState()
+    c.setFillColor(white)
+    c.rect(x, y, tamanho, tamanho, stroke=0, fill=1)
+    c.setFillColor(black)
+    caminho = c.beginPath()
+    for linha_idx, linha in enumerate(matriz):
+        topo = y + tamanho - (linha_idx + 1) * modulo
+        inicio = None
+        for col, preto in enumerate(linha + [False]):
+            if preto and inicio is None:
+                inicio = col
+            elif not preto and inicio is not None:
+                caminho.rect(x + inicio * modulo, topo, (col - inicio) * modulo, modulo)
+                inicio = None
+    c.drawPath(caminho, stroke=0, fill=1)
+    c.restoreState()
+
+def save_qr_png(veiculo, matriz=None):
+    """
+    Grava o QR-Code em VEICULO_IMAGE_DIR/qr_codes/qr_<id>.png (o PDF não depende deste arquivo).
+
+    Returns:
+        str: Caminho completo do PNG.
+    """
+    from PIL import Image
+    matriz = matriz or build_qr_matrix(veiculo)
+    box_size = 10
+    img = Image.new('1', (len(matriz), len(matriz)), 1)
+    img.putdata([0 if preto else 1 for linha in matriz for preto in linha])
+    img = img.resize((len(matriz) * box_size, len(matriz) * box_size), Image.Resampling.NEAREST)
+
+    qr_dir = os.path.join(current_app.config['VEICULO_IMAGE_DIR'], 'qr_codes')
+    os.makedirs(qr_dir, exist_ok=True)
+    qr_path = os.path.join(qr_dir, f"qr_{veiculo.id}.png")
+    with atomic_write(qr_path) as f:
+        img.save(f, 'PNG')
+    logger.info(f"QR-Code salvo em {qr_path}")
+    return qr_path
+
+def safra_do_veiculo(veiculo):
+    """Safra impressa na etiqueta: a do veículo (reimpressões de safras anteriores) ou a SAFRA atual."""
+    return getattr(veiculo, 'safra', None) or current_app.config['SAFRA']
+
+def label_inputs_hash(veiculo):
+    """Hash de tudo o que determina o PDF do ID de colheita (dados, link do QR-Code e layout)."""
+    return compute_hash({
+        'layout': LAYOUT_VERSION,
+        'placa': veiculo.placa,
+        'ativo': veiculo.ativo,
+        'sequencial': veiculo.sequencial,
+        'safra': safra_do_veiculo(veiculo),
+        'link': build_share_link(veiculo),
+    })
+
+def label_path(id_veiculo):
+    """Caminho completo do PDF do ID de colheita do veículo."""
+    return os.path.join(current_app.config['VEICULO_IMAGE_DIR'], 'pdfs', f"id_colheita_{id_veiculo}.pdf")
+
+def label_is_current(veiculo):
+    """Indica se o PDF existente corresponde aos dados atuais do veículo."""
+    return is_current(veiculo.id, 'pdf', label_inputs_hash(veiculo), label_path(veiculo.id))
+
+def generate_id_label(veiculo, force=False):
+    """
+    Gera o QR-Code e o PDF (A4, área de 140x80 mm) do ID de colheita do veículo.
+
+    Se o PDF existente foi gerado com as mesmas entradas (ver `render_manifest`), nada é
+    refeito, a menos que `force` seja verdadeiro.
+
+    Returns:
+        str: Caminho relativo do PDF (ex.: 'output/veiculos/pdfs/id_colheita_<id>.pdf').
+    """
+    pdf_path = label_path(veiculo.id)
+    pdf_dir = os.path.dirname(pdf_path)
+
+    hash_entradas = label_inputs_hash(veiculo)
+    # Com o lock do veículo, pedidos simultâneos geram o PDF uma única vez (ver artifact_store)
+    with vehicle_lock(veiculo.id):
+        if not force and is_current(veiculo.id, 'pdf', hash_entradas, pdf_path):
+            logger.info(f"PDF do veículo {veiculo.id} inalterado; geração ignorada.")
+            return pdf_relative_path(veiculo.id)
+
+        matriz = build_qr_matrix(veiculo)
+        if current_app.config.get('QR_SALVAR_PNG'):
+            save_qr_png(veiculo, matriz)
+
+        os.makedirs(pdf_dir, exist_ok=True)
+
+        # Criar o PDF em formato A4 (em arquivo temporário, trocado pelo definitivo ao final)
+        from reportlab.pdfgen import canvas
+        with atomic_write(pdf_path) as f:
+            c = canvas.Canvas(f, pagesize=A4)
+            draw_label(c, veiculo, matriz, 0)
+            c.showPage()
+            c.save()
+        logger.info(f"PDF finalizado no formato A4 com área de 140x80 mm e margem de 20px: {pdf_path}")
+        record(veiculo.id, 'pdf', hash_entradas)
+
+    return pdf_relative_path(veiculo.id)
+
+def draw_label(c, veiculo, matriz, posicao):
+    """
+    Desenha a etiqueta (140x80 mm) do veículo no canvas.
+
+    Args:
+        c: Canvas ReportLab em A4.
+        veiculo: Veículo com placa, ativo e sequencial.
+        matriz: Matriz do QR-Code (ver `build_qr_matrix`).
+        posicao: Posição na página, de cima para baixo (0 a ETIQUETAS_POR_PAGINA - 1).
+    """
+    from reportlab.lib.colors import black
+    page_width, page_height = A4
+    px_per_mm = PX_POR_MM
+    area_width, area_height = AREA_LARGURA, AREA_ALTURA
+    x_offset = MARGEM
+    y_offset = page_height - (posicao + 1) * (area_height + MARGEM)
+
+    left_margin = x_offset + 2 * mm  # Margem interna à esquerda da área
+    qr_margin = 2 * px_per_mm / mm
+    qr_size = area_height - 2 * qr_margin * mm
+
+    # Informações
+    lines = [
+        {"text": safra_do_veiculo(veiculo), "size": 30, "bold": True},
+        {"text": veiculo.placa, "size": 30, "bold": True},
+        {"text": veiculo.ativo, "size": 30, "bold": True},
+        {"text": f"{veiculo.sequencial:03d}", "size": 42, "bold": True},
+    ]
+
+    c.saveState()
+    line_spacing = -70
+    current_y = y_offset + area_height - 15 * px_per_mm
+    for line in lines:
+        font = "Helvetica-Bold" if line["bold"] else "Helvetica"
+        c.setFont(font, line["size"])
+        c.setFillColor(black)
+        c.drawString(left_margin, current_y, line["text"])
+        current_y -= line["size"] * px_per_mm + line_spacing
+
+    # QR Code (vetorial, direto da matriz)
+    qr_x = x_offset + area_width - qr_size - qr_margin * mm
+    qr_y = y_offset + qr_margin * mm
+    draw_qr_matrix(c, matriz, qr_x, qr_y, qr_size)
+
+    # Borda pontilhada
+    border_margin = 1 * mm
+    c.setLineWidth(0.5)
+    c.setDash(2, 2)
+    c.setStrokeColor(black)
+    c.rect(x_offset + border_margin, y_offset + border_margin,
+           area_width - 2 * border_margin, area_height - 2 * border_margin)
+    c.restoreState()
+
+def generate_batch_labels(veiculos, destino):
+    """
+    Gera um único PDF A4 com as etiquetas de vários veículos, ETIQUETAS_POR_PAGINA por página.
+
+    `veiculos` pode ser um gerador (ex.: páginas de `Veiculo.listar_pagina`): cada veículo é
+    desenhado assim que chega e o QR-Code é calculado uma única vez por veículo. O ReportLab
+    mantém as páginas na memória até `save()`, então a memória cresce com o tamanho do lote.
+
+    Args:
+        veiculos: Iterável de veículos.
+        destino: Caminho ou arquivo binário aberto onde o PDF é gravado.
+
+    Returns:
+        int: Quantidade de etiquetas geradas.
+    """
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(destino, pagesize=A4)
+    total = 0
+    for veiculo in veiculos:
+        posicao = total % ETIQUETAS_POR_PAGINA
+        if total and posicao == 0:
+            c.showPage()
+        draw_label(c, veiculo, build_qr_matrix(veiculo), posicao)
+        total += 1
+    if total == 0:
+        raise ValueError("Nenhum veículo encontrado para imprimir.")
+    c.showPage()
+    c.save()
+    logger.info(f"PDF em lote gerado com {total} etiqueta(s).")
+    return total
+
+def iter_vehicles(ids=None, filtros=None, lote=200):
+    """
+    Veículos a imprimir em lote: os IDs informados ou, sem eles, os que atendem aos filtros
+    de `Veiculo.listar_pagina` (com `arquivo` para uma safra arquivada), lidos em páginas por
+    ID crescente.
+    """
+    if ids:
+        yield from Veiculo.buscar_por_ids(ids)
+        return
+    filtros = {k: v for k, v in (filtros or {}).items() if v}
+    cursor = None
+    while True:
+        veiculos, cursor = Veiculo.listar_pagina(limite=lote, cursor=cursor, ordem='asc', **filtros)
+        yield from veiculos
+        if cursor is None:
+            break
+
+def pdf_relative_path(id_veiculo):
+    """Caminho relativo (a partir de static/) do PDF do ID de colheita."""
+    return os.path.join('output/veiculos/pdfs', f"id_colheita_{id_veiculo}.pdf").replace('\\', '/')
@@ -0,0 +1,58 @@
+# app/services/photo_ingest.py
+import os
+import shutil
+from flask import current_app
+from werkzeug.utils import secure_filename
+from ..utils.logger import setup_logger
+from .artifact_store import atomic_write
+
+logger = setup_logger()
+
+# Maior área que o renderizador ocupa com uma foto (ver VehicleImageRenderer.render)
+FOTO_LARGURA, FOTO_ALTURA = 1080, 720
+
+def ingest_photo(arquivo, nome_base):
+    """
+    Normaliza a foto enviada e grava o derivado em UPLOAD_FOLDER.
+
+    A foto é lida direto do stream do upload. Em JPEGs, o modo draft decodifica já reduzido
+    (escala 1/2, 1/4 ou 1/8), sem descompactar a imagem inteira do celular; em seguida a
+    orientação EXIF é aplicada e a foto é reduzida para caber em FOTO_LARGURA x FOTO_ALTURA.
+    O resultado é salvo como JPEG `<nome_base>.jpg`, que é o arquivo lido pelo renderizador.
+    Com FOTO_MANTER_ORIGINAL, o arquivo original é guardado em UPLOAD_FOLDER/originais.
+
+    Args:
+        arquivo: FileStorage do formulário.
+        nome_base: Nome do arquivo sem extensão (ex.: '<placa>_<ativo>_1').
+
+    Returns:
+        str: Nome do arquivo gravado em UPLOAD_FOLDER.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filename = secure_filename(f"{nome_base}.jpg")
+    destino = os.path.join(upload_folder, filename)
+    try:
+        if current_app.config.get('FOTO_MANTER_ORIGINAL'):
+            originais = os.path.join(upload_folder, 'originais')
+            os.makedirs(originais, exist_ok=True)
+            extensao = os.path.splitext(arquivo.filename or '')[1].lower()
+            caminho_original = os.path.join(originais, secure_filename(f"{nome_base}{extensao}"))
+            with atomic_write(caminho_original) as f:
+                shutil.copyfileobj(arquivo.stream, f)
+            arquivo.stream.seek(0)
+
+        from PIL import Image, ImageOps  # Importado no primeiro upload, não na carga das rotas
+        with Image.open(arquivo.stream) as img:
+            img.draft('RGB', (FOTO_LARGURA, FOTO_ALTURA))
+            foto = ImageOps.exif_transpose(img)
+            if foto.mode != 'RGB':
+                foto = foto.convert('RGB')
+            foto.thumbnail((FOTO_LARGURA, FOTO_ALTURA), Image.Resampling.LANCZOS)
+            # Substitui de forma atômica a foto anterior de mesmo nome, que pode estar sendo lida
+            with atomic_write(destino) as f:
+                foto.save(f, 'JPEG', quality=current_app.config.get('FOTO_QUALIDADE_JPEG', 85), optimize=True)
+        logger.info(f"Foto normalizada ({foto.width}x{foto.height}) salva em {destino}")
+        return filename
+    except Exception as e:
+        logger.error(f"Erro ao processar a foto {arquivo.filename}: {str(e)}")
+        raise
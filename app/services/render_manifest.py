@@ -0,0 +1,76 @@
+# app/services/render_manifest.py
+import hashlib
+import json
+import os
+from functools import lru_cache
+from ..models.database import get_db_connection
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+@lru_cache(maxsize=4096)
+def _digest_arquivo(caminho, tamanho, mtime_ns):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def file_digest(caminho):
+    """
+    SHA-256 do conteúdo do arquivo, ou None se ele não existir.
+
+    O resultado fica em cache por (caminho, tamanho, mtime), então o arquivo só é relido
+    quando muda.
+    """
+    if not caminho:
+        return None
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return _digest_arquivo(caminho, st.st_size, st.st_mtime_ns)
+
+def compute_hash(entradas):
+    """Hash estável (SHA-256) de um dicionário com todas as entradas de um artefato."""
+    conteudo = json.dumps(entradas, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def is_current(veiculo_id, artefato, hash_entradas, caminho):
+    """Indica se o artefato em `caminho` já foi gerado a partir exatamente destas entradas."""
+    if not os.path.exists(caminho):
+        return False
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT hash FROM render_manifesto WHERE veiculo_id = ? AND artefato = ?",
+                       (veiculo_id, artefato))
+        linha = cursor.fetchone()
+        return linha is not None and linha[0] == hash_entradas
+    except Exception as e:
+        logger.error(f"Erro ao consultar manifesto de {artefato} do veículo {veiculo_id}: {str(e)}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+
+def record(veiculo_id, artefato, hash_entradas):
+    """Registra o hash das entradas do artefato recém-gerado."""
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO render_manifesto (veiculo_id, artefato, hash, atualizado_em)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(veiculo_id, artefato) DO UPDATE SET hash = excluded.hash, atualizado_em = CURRENT_TIMESTAMP
+        """, (veiculo_id, artefato, hash_entradas))
+        connection.commit()
+    except Exception as e:
+        connection.rollback()
+        logger.error(f"Erro ao registrar manifesto de {artefato} do veículo {veiculo_id}: {str(e)}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
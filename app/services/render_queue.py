@@ -0,0 +1,278 @@
+# app/services/render_queue.py
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from ..models.database import get_db_connection, transacao_imediata
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+TIPOS_RENDER = ('imagem', 'pdf')
+# Tarefa 'executando' cujo dono não pode ser verificado (outra máquina, Windows, PID
+# reaproveitado) é considerada abandonada depois deste tempo
+EXPIRACAO_EXECUCAO = '-10 minutes'
+# Intervalo mínimo, em segundos, entre as procuras de tarefas órfãs feitas por `enqueue`
+INTERVALO_VERIFICACAO = 60
+
+def _processo_ativo(pid):
+    """Se o processo `pid` desta máquina ainda existe (no Windows não há como saber: assume que sim)."""
+    if os.name == 'nt':
+        return True  # os.kill no Windows encerraria o processo
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Existe, mas é de outro usuário
+    return True
+
+def _executar_tarefa(tipo, veiculo_id):
+    """Gera o artefato `tipo` do veículo. Retorna False se o veículo não existe mais."""
+    # Importados aqui: os geradores dependem dos modelos, que não devem depender da fila
+    from ..models.veiculo import Veiculo
+    from .image_generator import generate_vehicle_image
+    from .label_generator import generate_id_label
+
+    veiculo = Veiculo.buscar_com_fornecedor(veiculo_id)
+    if veiculo is None:
+        return False
+    if tipo == 'imagem':
+        generate_vehicle_image(veiculo)
+    else:
+        generate_id_label(veiculo)
+    return True
+
+class RenderQueue:
+    """
+    Fila de geração de imagens, QR-Codes e PDFs dos veículos, executada fora da requisição.
+
+    Cada tarefa é gravada na tabela `render_jobs` antes de ir para o pool de threads, de modo
+    que um reinício não perde trabalho: tarefas pendentes são retomadas na primeira requisição
+    do processo. Um índice único parcial impede duas tarefas pendentes iguais para o mesmo
+    veículo, e a tarefa só é executada por quem conseguir marcá-la como 'executando'.
+
+    Quem assume a tarefa grava em `dono` a máquina, o PID e um token do processo. Uma tarefa
+    'executando' cujo dono não existe mais (worker reiniciado, processo morto) volta para a
+    fila ao ser encontrada: na primeira requisição do processo, na consulta de situação do
+    veículo (a página de impressão consulta até o PDF ficar pronto) e, no máximo a cada
+    INTERVALO_VERIFICACAO segundos, ao enfileirar.
+    Com RENDER_ASSINCRONO desativado (testes, CLI), as tarefas rodam na hora.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._recuperado = False
+        self._ultima_verificacao = 0.0
+        self._processo = (None, None)  # (PID, token) do dono gravado nas tarefas
+
+    def _dono(self):
+        """Identificação deste processo nas tarefas; um novo token após um fork."""
+        pid, token = self._processo
+        if pid != os.getpid():
+            pid, token = os.getpid(), uuid.uuid4().hex[:8]
+            self._processo = (pid, token)
+        return f"{socket.gethostname()}:{pid}:{token}"
+
+    def _dono_ausente(self, dono):
+        """Se o processo que assumiu a tarefa certamente não existe mais."""
+        if not dono:
+            return False  # Assumida antes do registro do dono: só pela expiração
+        maquina, pid, token = dono.rsplit(':', 2)
+        if maquina != socket.gethostname():
+            return False
+        if int(pid) == os.getpid():
+            return dono != self._dono()  # Mesmo PID, outra execução do processo
+        return not _processo_ativo(int(pid))
+
+    def init_app(self, app):
+        @app.before_request
+        def _retomar_tarefas_pendentes():
+            if not self._recuperado:
+                self.recover()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = current_app.config.get('RENDER_WORKERS', 2)
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        return self._executor
+
+    def enqueue(self, veiculo_id, *tipos):
+        """
+        Agenda a geração dos artefatos do veículo ('imagem' e/ou 'pdf'; padrão: ambos).
+
+        Se já houver tarefa pendente igual, ela é reaproveitada (ainda não começou, então
+        vai gerar com os dados atuais).
+        """
+        tipos = tipos or TIPOS_RENDER
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            ids = []
+            for tipo in tipos:
+                if tipo not in TIPOS_RENDER:
+                    raise ValueError(f"Tipo de renderização inválido: {tipo}")
+                cursor.execute("INSERT OR IGNORE INTO render_jobs (veiculo_id, tipo) VALUES (?, ?)", (veiculo_id, tipo))
+                if cursor.rowcount:
+                    ids.append(cursor.lastrowid)
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"Erro ao enfileirar renderização do veículo {veiculo_id}: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+        self._despachar(ids)
+        if time.monotonic() - self._ultima_verificacao >= INTERVALO_VERIFICACAO:
+            self._ultima_verificacao = time.monotonic()
+            self._despachar(self._recuperar_orfas())
+
+    def _despachar(self, ids):
+        """Executa as tarefas no pool de threads (ou na hora, sem RENDER_ASSINCRONO)."""
+        if not current_app.config.get('RENDER_ASSINCRONO', True):
+            for job_id in ids:
+                self._executar(job_id)
+            return
+        app = current_app._get_current_object()
+        for job_id in ids:
+            self._pool().submit(self._executar_em_contexto, app, job_id)
+
+    def _executar_em_contexto(self, app, job_id):
+        with app.app_context():
+            self._executar(job_id)
+
+    def _executar(self, job_id):
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                UPDATE render_jobs
+                SET status = 'executando', dono = ?, tentativas = tentativas + 1, atualizado_em = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'pendente'
+            """, (self._dono(), job_id))
+            connection.commit()
+            if cursor.rowcount == 0:
+                return  # Já assumida por outra thread/processo
+            cursor.execute("SELECT veiculo_id, tipo FROM render_jobs WHERE id = ?", (job_id,))
+            veiculo_id, tipo = cursor.fetchone()
+            try:
+                existe = _executar_tarefa(tipo, veiculo_id)
+                status, erro = ('concluido', None) if existe else ('erro', 'Veículo não encontrado')
+            except Exception as e:
+                logger.error(f"Erro na tarefa de renderização {job_id} ({tipo} de {veiculo_id}): {str(e)}")
+                status, erro = 'erro', str(e)
+            cursor.execute("""
+                UPDATE render_jobs SET status = ?, erro = ?, atualizado_em = CURRENT_TIMESTAMP WHERE id = ?
+            """, (status, erro, job_id))
+            connection.commit()
+        except Exception as e:
+            logger.error(f"Erro ao processar tarefa de renderização {job_id}: {str(e)}")
+        finally:
+            cursor.close()
+
+    def _recuperar_orfas(self, veiculo_id=None):
+        """
+        Devolve à fila as tarefas 'executando' de donos que não existem mais (ou expiradas).
+
+        Returns:
+            list: IDs das tarefas que voltaram a 'pendente', a despachar.
+        """
+        filtro, parametros = (" AND veiculo_id = ?", (veiculo_id,)) if veiculo_id else ("", ())
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT id, dono, atualizado_em < datetime('now', ?) AS expirada
+                FROM render_jobs WHERE status = 'executando'{filtro}
+            """, (EXPIRACAO_EXECUCAO, *parametros))
+            orfas = [row['id'] for row in cursor.fetchall() if row['expirada'] or self._dono_ausente(row['dono'])]
+            if not orfas:
+                return []
+            marcadores = ', '.join('?' * len(orfas))
+            with transacao_imediata(connection):
+                cursor.execute(f"""
+                    UPDATE OR IGNORE render_jobs SET status = 'pendente', dono = NULL, atualizado_em = CURRENT_TIMESTAMP
+                    WHERE id IN ({marcadores}) AND status = 'executando'
+                """, orfas)
+                # As que não voltaram já têm uma tarefa pendente igual, que fará o trabalho
+                cursor.execute(f"DELETE FROM render_jobs WHERE id IN ({marcadores}) AND status = 'executando'", orfas)
+            cursor.execute(f"SELECT id FROM render_jobs WHERE id IN ({marcadores}) AND status = 'pendente'", orfas)
+            retomadas = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Erro ao recuperar tarefas de renderização interrompidas: {str(e)}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+        if retomadas:
+            logger.warning(f"{len(retomadas)} tarefa(s) de renderização interrompida(s) devolvida(s) à fila.")
+        return retomadas
+
+    def recover(self):
+        """Retoma tarefas pendentes ou interrompidas e descarta o histórico antigo."""
+        with self._lock:
+            if self._recuperado:
+                return
+            self._recuperado = True
+        self._ultima_verificacao = time.monotonic()
+        self._recuperar_orfas()
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                DELETE FROM render_jobs
+                WHERE status IN ('concluido', 'erro') AND atualizado_em < datetime('now', '-7 days')
+            """)
+            connection.commit()
+            cursor.execute("SELECT id FROM render_jobs WHERE status = 'pendente' ORDER BY id")
+            pendentes = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"Erro ao retomar tarefas de renderização: {str(e)}")
+            return
+        finally:
+            if cursor:
+                cursor.close()
+        if pendentes:
+            logger.info(f"Retomando {len(pendentes)} tarefa(s) de renderização pendente(s).")
+            self._despachar(pendentes)
+
+    def status(self, veiculo_id):
+        """
+        Situação da tarefa mais recente de cada tipo para o veículo.
+
+        Antes, tarefas interrompidas do veículo voltam para a fila (ver `_recuperar_orfas`),
+        então quem consulta nunca espera por uma tarefa que ninguém está executando.
+
+        Returns:
+            dict: {tipo: {'status': ..., 'erro': ...}} apenas para os tipos que já tiveram tarefas.
+        """
+        self._despachar(self._recuperar_orfas(veiculo_id))
+        connection = get_db_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT tipo, status, erro FROM render_jobs
+                WHERE id IN (SELECT MAX(id) FROM render_jobs WHERE veiculo_id = ? GROUP BY tipo)
+            """, (veiculo_id,))
+            return {row['tipo']: {'status': row['status'], 'erro': row['erro']} for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Erro ao consultar renderização do veículo {veiculo_id}: {str(e)}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+render_queue = RenderQueue()
@@ -0,0 +1,113 @@
+# app/services/season_archive.py
+import os
+from functools import lru_cache
+from flask import current_app
+from ..models.database import arquivo_anexado, caminho_arquivo, transacao_imediata
+from ..models.geracao import incrementar_geracao, obter_geracao
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Colunas copiadas de `veiculos`; o arquivo guarda também o nome do fornecedor na época,
+# para que o veículo continue legível mesmo se o fornecedor for removido depois
+COLUNAS = ('id', 'id_fornecedor', 'placa', 'ativo', 'status', 'sequencial', 'foto1', 'foto2', 'safra')
+
+def _criar_tabelas_arquivo(cursor):
+    """Schema do banco de arquivo (anexado como `arquivo`), criado na primeira vez que é usado."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS arquivo.veiculos (
+            id INTEGER PRIMARY KEY,
+            id_fornecedor INTEGER NOT NULL,
+            placa TEXT NOT NULL,
+            ativo TEXT NOT NULL,
+            status TEXT NOT NULL,
+            sequencial INTEGER NOT NULL,
+            foto1 TEXT,
+            foto2 TEXT,
+            safra TEXT NOT NULL,
+            fornecedor_nome TEXT,
+            arquivado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_safra_id ON veiculos(safra, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_placa ON veiculos(placa)")
+
+def archive_season(safra):
+    """
+    Move os veículos de uma safra encerrada do banco principal para o banco de arquivo.
+
+    A cópia e a remoção rodam na mesma transação. Em modo WAL o SQLite não garante a
+    atomicidade entre arquivos diferentes, por isso a cópia usa INSERT OR REPLACE: se uma
+    queda deixar os veículos nos dois bancos, basta executar o comando de novo. Os contadores
+    de sequencial da safra são descartados. Imagens e PDFs já gerados continuam no disco.
+
+    Returns:
+        int: Quantidade de veículos arquivados.
+
+    Raises:
+        ValueError: Se a safra for vazia ou a SAFRA atual.
+    """
+    if not safra:
+        raise ValueError("Informe a safra a arquivar.")
+    if safra == current_app.config.get('SAFRA'):
+        raise ValueError(f"A safra {safra} é a atual e não pode ser arquivada.")
+
+    colunas = ', '.join(COLUNAS)
+    cursor = None
+    try:
+        with arquivo_anexado(criar=True) as connection:
+            cursor = connection.cursor()
+            with transacao_imediata(connection):
+                _criar_tabelas_arquivo(cursor)
+            with transacao_imediata(connection):
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO arquivo.veiculos ({colunas}, fornecedor_nome)
+                    SELECT {', '.join('v.' + c for c in COLUNAS)}, f.nome
+                    FROM veiculos v
+                    LEFT JOIN fornecedores f ON f.id = v.id_fornecedor
+                    WHERE v.safra = ?
+                """, (safra,))
+                cursor.execute("DELETE FROM veiculos WHERE safra = ?", (safra,))
+                arquivados = cursor.rowcount
+                cursor.execute("DELETE FROM sequenciais_livres WHERE escopo = ?", (safra,))
+                cursor.execute("DELETE FROM sequenciais WHERE escopo = ?", (safra,))
+                incrementar_geracao(cursor, 'safras_arquivadas')
+        logger.info(f"Safra {safra} arquivada: {arquivados} veículo(s) movido(s) para o banco de arquivo.")
+        return arquivados
+    except Exception as e:
+        logger.error(f"Erro ao arquivar a safra {safra}: {str(e)}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+
+@lru_cache(maxsize=8)
+def _safras_do_arquivo(caminho, geracao):
+    with arquivo_anexado() as connection:
+        if connection is None:
+            return ()
+        tabela = connection.execute(
+            "SELECT 1 FROM arquivo.sqlite_master WHERE type = 'table' AND name = 'veiculos'").fetchone()
+        if tabela is None:
+            return ()
+        return tuple(row[0] for row in connection.execute(
+            "SELECT DISTINCT safra FROM arquivo.veiculos ORDER BY safra DESC").fetchall())
+
+def archived_seasons():
+    """
+    Safras já arquivadas, da mais recente para a mais antiga.
+
+    O resultado fica em cache pela geração 'safras_arquivadas', incrementada na mesma
+    transação de `archive_season`; assim a listagem não precisa anexar o arquivo a cada
+    requisição e vê a nova safra em todos os workers assim que o arquivamento é confirmado.
+    """
+    caminho = caminho_arquivo()
+    if not os.path.exists(caminho):
+        return []
+    return list(_safras_do_arquivo(caminho, obter_geracao('safras_arquivadas')))
+
+def is_archived_season(safra):
+    """Se os veículos da safra estão só no banco de arquivo (consultas com `arquivo=True`)."""
+    from ..models.veiculo import Veiculo
+
+    return bool(safra) and safra in archived_seasons() and safra not in Veiculo.listar_safras()
@@ -0,0 +1,121 @@
+# app/services/sequence_generator.py
+from flask import current_app
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+def sequence_scope(safra=None):
+    """
+    Escopo da numeração: com SEQUENCIAL_POR_SAFRA ativo, a safra informada (padrão: a SAFRA
+    atual); senão 'global'.
+    """
+    safra = safra or current_app.config.get('SAFRA')
+    if current_app.config.get('SEQUENCIAL_POR_SAFRA') and safra:
+        return safra
+    return 'global'
+
+def _filtro_escopo(escopo):
+    """Condição extra sobre `veiculos` que limita a consulta aos veículos do escopo."""
+    return ("", ()) if escopo == 'global' else (" AND safra = ?", (escopo,))
+
+def _inicializar_escopo(cursor, escopo, maximo):
+    """Cria o contador do escopo a partir dos veículos já cadastrados, registrando as lacunas como livres."""
+    filtro, parametros = _filtro_escopo(escopo)
+    cursor.execute(f"SELECT DISTINCT sequencial FROM veiculos WHERE sequencial BETWEEN 1 AND ?{filtro}",
+                   (maximo, *parametros))
+    em_uso = {row[0] for row in cursor.fetchall()}
+    maior = max(em_uso, default=0)
+    livres = [(escopo, n) for n in range(1, maior) if n not in em_uso]
+    cursor.executemany("INSERT OR IGNORE INTO sequenciais_livres (escopo, numero) VALUES (?, ?)", livres)
+    cursor.execute("INSERT INTO sequenciais (escopo, proximo) VALUES (?, ?)", (escopo, maior + 1))
+    logger.info(f"Escopo de sequencial '{escopo}' inicializado (próximo {maior + 1}, {len(livres)} livres).")
+    return maior + 1
+
+def allocate_sequencial(cursor, escopo=None):
+    """
+    Aloca o menor número sequencial livre do escopo.
+
+    Números devolvidos por `release_sequencial` são reaproveitados primeiro (menor número via
+    índice da chave primária); sem números livres, usa o contador do escopo. Deve ser chamada
+    na mesma transação (com lock de escrita) do INSERT do veículo.
+
+    Raises:
+        ValueError: Se todos os números até SEQUENCIAL_MAXIMO estiverem em uso.
+    """
+    escopo = escopo or sequence_scope()
+    maximo = current_app.config.get('SEQUENCIAL_MAXIMO', 999)
+
+    cursor.execute("SELECT MIN(numero) FROM sequenciais_livres WHERE escopo = ?", (escopo,))
+    numero = cursor.fetchone()[0]
+    if numero is not None:
+        cursor.execute("DELETE FROM sequenciais_livres WHERE escopo = ? AND numero = ?", (escopo, numero))
+        return numero
+
+    cursor.execute("SELECT proximo FROM sequenciais WHERE escopo = ?", (escopo,))
+    linha = cursor.fetchone()
+    if linha is None:
+        _inicializar_escopo(cursor, escopo, maximo)
+        # A inicialização pode ter registrado lacunas: elas têm prioridade
+        return allocate_sequencial(cursor, escopo)
+    proximo = linha[0]
+    if proximo > maximo:
+        raise ValueError(f"Todos os números sequenciais de 1 a {maximo} estão em uso no escopo '{escopo}'.")
+    cursor.execute("UPDATE sequenciais SET proximo = ? WHERE escopo = ?", (proximo + 1, escopo))
+    return proximo
+
+def allocate_sequenciais(cursor, quantidade, escopo=None):
+    """
+    Aloca `quantidade` números de uma vez (cadastros em lote), com a mesma política de
+    `allocate_sequencial`: primeiro os menores números livres, depois o contador.
+
+    Raises:
+        ValueError: Se não houver números suficientes até SEQUENCIAL_MAXIMO.
+    """
+    escopo = escopo or sequence_scope()
+    maximo = current_app.config.get('SEQUENCIAL_MAXIMO', 999)
+
+    cursor.execute("SELECT proximo FROM sequenciais WHERE escopo = ?", (escopo,))
+    linha = cursor.fetchone()
+    proximo = linha[0] if linha else _inicializar_escopo(cursor, escopo, maximo)
+
+    cursor.execute("SELECT numero FROM sequenciais_livres WHERE escopo = ? ORDER BY numero LIMIT ?",
+                   (escopo, quantidade))
+    numeros = [row[0] for row in cursor.fetchall()]
+    faltantes = quantidade - len(numeros)
+    if proximo + faltantes - 1 > maximo:
+        raise ValueError(f"Não há {quantidade} números sequenciais disponíveis até {maximo} no escopo '{escopo}'.")
+    if numeros:
+        cursor.execute("DELETE FROM sequenciais_livres WHERE escopo = ? AND numero <= ?", (escopo, numeros[-1]))
+    if faltantes:
+        numeros.extend(range(proximo, proximo + faltantes))
+        cursor.execute("UPDATE sequenciais SET proximo = ? WHERE escopo = ?", (proximo + faltantes, escopo))
+    return numeros
+
+def sequenciais_disponiveis(cursor, escopo=None):
+    """Quantidade de números ainda livres no escopo até SEQUENCIAL_MAXIMO (livres + não usados pelo contador)."""
+    escopo = escopo or sequence_scope()
+    maximo = current_app.config.get('SEQUENCIAL_MAXIMO', 999)
+
+    cursor.execute("SELECT proximo FROM sequenciais WHERE escopo = ?", (escopo,))
+    linha = cursor.fetchone()
+    if linha is None:
+        filtro, parametros = _filtro_escopo(escopo)
+        cursor.execute(f"SELECT COUNT(DISTINCT sequencial) FROM veiculos WHERE sequencial BETWEEN 1 AND ?{filtro}",
+                       (maximo, *parametros))
+        return maximo - cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM sequenciais_livres WHERE escopo = ?", (escopo,))
+    return cursor.fetchone()[0] + max(maximo - linha[0] + 1, 0)
+
+def release_sequencial(cursor, numero, escopo=None):
+    """Devolve o número ao escopo para reaproveitamento, se nenhum outro veículo ainda o utiliza."""
+    escopo = escopo or sequence_scope()
+    if numero is None:
+        return
+    filtro, parametros = _filtro_escopo(escopo)
+    cursor.execute(f"SELECT 1 FROM veiculos WHERE sequencial = ?{filtro} LIMIT 1", (numero, *parametros))
+    if cursor.fetchone():
+        return
+    cursor.execute("SELECT proximo FROM sequenciais WHERE escopo = ?", (escopo,))
+    linha = cursor.fetchone()
+    if linha is not None and numero < linha[0]:
+        cursor.execute("INSERT OR IGNORE INTO sequenciais_livres (escopo, numero) VALUES (?, ?)", (escopo, numero))
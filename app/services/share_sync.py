@@ -0,0 +1,193 @@
+# app/services/share_sync.py
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from ..models.database import get_db_connection, transacao_imediata
+from .render_manifest import file_digest
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+def _sincronizar_arquivo(origem, share_dir, hardlink):
+    """
+    Publica `origem` em `share_dir` com o mesmo nome.
+
+    Returns:
+        str: 'copiado', 'igual' (destino já tem o mesmo conteúdo) ou 'ausente' (origem não existe mais).
+    """
+    try:
+        st_origem = os.stat(origem)
+    except FileNotFoundError:
+        return 'ausente'
+    destino = os.path.join(share_dir, os.path.basename(origem))
+    try:
+        st_destino = os.stat(destino)
+    except FileNotFoundError:
+        st_destino = None
+    if st_destino is not None and st_destino.st_size == st_origem.st_size:
+        if os.path.samestat(st_origem, st_destino) or file_digest(destino) == file_digest(origem):
+            return 'igual'
+
+    os.makedirs(share_dir, exist_ok=True)
+    # Gravado com nome temporário na própria pasta e trocado com os.replace: quem lê o
+    # compartilhamento (ou o cliente de sincronização) nunca vê um arquivo pela metade
+    temporario = os.path.join(share_dir, f".{os.path.basename(origem)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        vinculado = False
+        if hardlink and st_origem.st_dev == os.stat(share_dir).st_dev:
+            try:
+                os.link(origem, temporario)
+                vinculado = True
+            except OSError:
+                pass  # Sistema de arquivos sem suporte a hardlinks: copia
+        if not vinculado:
+            shutil.copy2(origem, temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return 'copiado'
+
+class ShareSync:
+    """
+    Cópia dos artefatos gerados para SHARE_IMAGE_DIR (pasta sincronizada), fora da renderização.
+
+    `enqueue` só grava o caminho na tabela `share_sync`, então um compartilhamento lento ou
+    fora do ar nunca atrasa o cadastro. Uma única thread esvazia a fila em lotes: arquivos
+    que já estão iguais no destino são ignorados, os demais são publicados de forma atômica
+    (hardlink ou cópia para um temporário + os.replace). Falhas voltam para a fila com espera
+    crescente (SHARE_SYNC_ESPERA, dobrando a cada tentativa até SHARE_SYNC_ESPERA_MAXIMA).
+    Com RENDER_ASSINCRONO desativado (testes, CLI), a fila é processada na hora.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._agendado = False
+        self._timer = None
+        self._recuperado = False
+
+    def init_app(self, app):
+        @app.before_request
+        def _retomar_copias_pendentes():
+            if not self._recuperado:
+                self._recuperado = True
+                self._agendar()
+
+    def enqueue(self, caminho):
+        """Agenda a publicação do arquivo; um pedido repetido do mesmo arquivo substitui o anterior."""
+        connection = get_db_connection()
+        try:
+            connection.execute("""
+                INSERT INTO share_sync (caminho) VALUES (?)
+                ON CONFLICT(caminho) DO UPDATE SET versao = versao + 1, tentativas = 0,
+                                                   proxima_tentativa = CURRENT_TIMESTAMP, erro = NULL
+            """, (os.path.abspath(caminho),))
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"Erro ao agendar a cópia de {caminho} para o compartilhamento: {str(e)}")
+            raise
+        self._agendar()
+
+    def _agendar(self):
+        if not current_app.config.get('RENDER_ASSINCRONO', True):
+            self.process()
+            return
+        with self._lock:
+            if self._agendado:
+                return  # Já há uma execução na fila, que vai pegar este pedido
+            self._agendado = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='share-sync')
+        self._executor.submit(self._executar_em_contexto, current_app._get_current_object())
+
+    def _executar_em_contexto(self, app):
+        with app.app_context():
+            with self._lock:
+                self._agendado = False
+            try:
+                self.process()
+                self._agendar_nova_tentativa(app)
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar o compartilhamento: {str(e)}")
+
+    def _agendar_nova_tentativa(self, app):
+        """Programa a próxima execução para quando vencer a espera da falha mais próxima."""
+        segundos = get_db_connection().execute("""
+            SELECT (julianday(MIN(proxima_tentativa)) - julianday('now')) * 86400 FROM share_sync
+        """).fetchone()[0]
+        if segundos is None:
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(segundos, 0) + 1, self._agendar_em_contexto, (app,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _agendar_em_contexto(self, app):
+        with app.app_context():
+            self._agendar()
+
+    def process(self, todos=False):
+        """
+        Publica os arquivos da fila cuja espera já venceu (ou todos, com `todos`), em lotes.
+
+        Returns:
+            dict: {'copiados', 'iguais' (já iguais no destino ou removidos da origem),
+                   'falhas': [(caminho, mensagem)]}.
+        """
+        config = current_app.config
+        share_dir = config['SHARE_IMAGE_DIR']
+        lote = config.get('SHARE_SYNC_LOTE', 50)
+        connection = get_db_connection()
+        resultado = {'copiados': 0, 'iguais': 0, 'falhas': []}
+        ultimo = ''
+        while True:
+            pendentes = connection.execute("""
+                SELECT caminho, versao, tentativas FROM share_sync
+                WHERE caminho > ? AND (? OR proxima_tentativa <= CURRENT_TIMESTAMP)
+                ORDER BY caminho LIMIT ?
+            """, (ultimo, bool(todos), lote)).fetchall()
+            if not pendentes:
+                break
+            concluidos, falhas = [], []
+            for caminho, versao, tentativas in pendentes:
+                try:
+                    situacao = _sincronizar_arquivo(caminho, share_dir, config.get('SHARE_SYNC_HARDLINK', True))
+                    resultado['copiados' if situacao == 'copiado' else 'iguais'] += 1
+                    concluidos.append((caminho, versao))
+                except Exception as e:
+                    espera = min(config.get('SHARE_SYNC_ESPERA', 30) * 2 ** tentativas,
+                                 config.get('SHARE_SYNC_ESPERA_MAXIMA', 3600))
+                    falhas.append((str(e), f"+{int(espera)} seconds", caminho, versao))
+                    resultado['falhas'].append((caminho, str(e)))
+                    logger.warning(f"Falha ao copiar {caminho} para o compartilhamento "
+                                   f"(tentativa {tentativas + 1}, nova tentativa em {int(espera)}s): {str(e)}")
+            # Só remove da fila se não houve novo pedido do arquivo durante a cópia
+            with transacao_imediata(connection):
+                connection.executemany("DELETE FROM share_sync WHERE caminho = ? AND versao = ?", concluidos)
+                connection.executemany("""
+                    UPDATE share_sync SET tentativas = tentativas + 1, erro = ?,
+                                          proxima_tentativa = datetime('now', ?)
+                    WHERE caminho = ? AND versao = ?
+                """, falhas)
+            ultimo = pendentes[-1]['caminho']
+            if len(pendentes) < lote:
+                break
+        if resultado['copiados'] or resultado['falhas']:
+            logger.info(f"Compartilhamento: {resultado['copiados']} copiado(s), {resultado['iguais']} já iguais, "
+                        f"{len(resultado['falhas'])} falha(s).")
+        return resultado
+
+    def pending(self):
+        """Quantidade de arquivos aguardando cópia e quantos deles já falharam."""
+        linha = get_db_connection().execute(
+            "SELECT COUNT(*), COUNT(erro) FROM share_sync").fetchone()
+        return {'pendentes': linha[0], 'com_falha': linha[1]}
+
+share_sync = ShareSync()
@@ -0,0 +1,106 @@
+# app/services/thumbnails.py
+import hashlib
+import os
+import threading
+from flask import current_app
+from ..utils.logger import setup_logger
+from .artifact_store import atomic_write
+
+logger = setup_logger()
+
+# Lado maior da miniatura: o dobro dos 100px exibidos, para telas de alta densidade
+THUMB_TAMANHO = 200
+FORMATOS = {'webp': ('WEBP', 'image/webp'), 'jpeg': ('JPEG', 'image/jpeg')}
+
+_lock_limpeza = threading.Lock()
+
+def thumbnail_dir():
+    """Diretório das miniaturas (THUMB_DIR ou `miniaturas` ao lado do UPLOAD_FOLDER)."""
+    return current_app.config.get('THUMB_DIR') or os.path.join(
+        os.path.dirname(os.path.normpath(current_app.config['UPLOAD_FOLDER'])), 'miniaturas')
+
+def photo_version(filename):
+    """
+    Versão da foto de UPLOAD_FOLDER (hash do tamanho e da data de modificação), usada na URL
+    da miniatura: substituir a foto (mesmo nome) muda a URL. None se a foto não existir.
+    """
+    try:
+        st = os.stat(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+    except OSError:
+        return None
+    return hashlib.sha1(f"{st.st_size}|{st.st_mtime_ns}".encode('utf-8')).hexdigest()[:10]
+
+def get_thumbnail(filename, formato='jpeg'):
+    """
+    Retorna a miniatura de uma foto de UPLOAD_FOLDER, gerando-a na primeira vez.
+
+    O nome da miniatura inclui um hash do nome, tamanho e data de modificação da foto, que
+    também serve de ETag: quando a foto é substituída, a miniatura antiga deixa de ser usada
+    e acaba removida pela limpeza (as menos acessadas primeiro) ao passar de THUMB_CACHE_MAX_MB.
+
+    Args:
+        filename: Nome da foto em UPLOAD_FOLDER.
+        formato: 'webp' ou 'jpeg'.
+
+    Returns:
+        tuple: (caminho da miniatura, ETag, mimetype), ou None se a foto não existir.
+    """
+    origem = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    try:
+        st = os.stat(origem)
+    except OSError:
+        return None
+    formato_pil, mimetype = FORMATOS[formato]
+    chave = hashlib.sha1(f"{filename}|{st.st_size}|{st.st_mtime_ns}|{THUMB_TAMANHO}|{formato}".encode('utf-8')).hexdigest()[:20]
+    pasta = thumbnail_dir()
+    caminho = os.path.join(pasta, f"{os.path.splitext(filename)[0]}_{chave}.{formato}")
+
+    if os.path.exists(caminho):
+        os.utime(caminho)  # Marca como usada recentemente (ordem da limpeza)
+        return caminho, chave, mimetype
+
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        from PIL import Image, ImageOps  # Importado na primeira miniatura, não na carga das rotas
+        with Image.open(origem) as img:
+            img.draft('RGB', (THUMB_TAMANHO, THUMB_TAMANHO))
+            miniatura = ImageOps.exif_transpose(img)
+            if miniatura.mode != 'RGB':
+                miniatura = miniatura.convert('RGB')
+            miniatura.thumbnail((THUMB_TAMANHO, THUMB_TAMANHO), Image.Resampling.LANCZOS)
+            # Grava em arquivo temporário e renomeia: requisições simultâneas nunca leem pela metade
+            with atomic_write(caminho) as f:
+                miniatura.save(f, formato_pil, quality=80)
+        logger.debug(f"Miniatura gerada em {caminho}")
+    except Exception as e:
+        logger.error(f"Erro ao gerar miniatura de {filename}: {str(e)}")
+        raise
+    _limitar_cache(pasta, manter=caminho)
+    return caminho, chave, mimetype
+
+def _limitar_cache(pasta, manter=None):
+    """Remove as miniaturas usadas há mais tempo até o cache ficar abaixo do limite."""
+    limite = current_app.config.get('THUMB_CACHE_MAX_MB', 200) * 1024 * 1024
+    if not _lock_limpeza.acquire(blocking=False):
+        return  # Outra thread já está limpando
+    try:
+        arquivos = [e for e in os.scandir(pasta) if e.is_file() and not e.name.endswith('.tmp')]
+        total = sum(e.stat().st_size for e in arquivos)
+        if total <= limite:
+            return
+        removidos = 0
+        for entrada in sorted(arquivos, key=lambda e: e.stat().st_mtime):
+            if total <= limite * 0.9:
+                break
+            if entrada.path == manter:
+                continue
+            try:
+                tamanho = entrada.stat().st_size
+                os.remove(entrada.path)
+                total -= tamanho
+                removidos += 1
+            except OSError:
+                pass
+        logger.info(f"Cache de miniaturas reduzido: {removidos} arquivo(s) removido(s).")
+    finally:
+        _lock_limpeza.release()
@@ -0,0 +1,149 @@
+# app/services/veiculo_index.py
+import re
+import threading
+from flask import current_app
+from ..models.database import get_db_connection
+from .fornecedor_cache import fornecedor_cache
+from ..utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Acima desta quantidade de alterações pendentes, recarregar tudo sai mais barato
+RECARGA_COMPLETA = 2000
+
+_COLUNAS = "id, id_fornecedor, placa, ativo, status, sequencial, safra"
+
+def normalizar_placa(placa):
+    """Placa em maiúsculas, sem hífen nem espaços (como lida do QR-Code ou digitada no portão)."""
+    return re.sub(r'[\s-]', '', placa or '').upper()
+
+class _Estado:
+    """Índices de um banco: veículo por ID e IDs por placa e por ativo."""
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.por_id = {}
+        self.por_placa = {}
+        self.por_ativo = {}
+
+    def _indexar(self, indice, chave, id_, remover=False):
+        # Tuplas são substituídas (nunca alteradas), então leituras sem lock são seguras
+        ids = indice.get(chave, ())
+        ids = tuple(i for i in ids if i != id_) if remover else ids + (id_,)
+        if ids:
+            indice[chave] = ids
+        else:
+            indice.pop(chave, None)
+
+    def remover(self, id_):
+        registro = self.por_id.pop(id_, None)
+        if registro is not None:
+            self._indexar(self.por_placa, normalizar_placa(registro['placa']), id_, remover=True)
+            self._indexar(self.por_ativo, registro['ativo'], id_, remover=True)
+
+    def adicionar(self, linha):
+        id_ = str(linha['id'])
+        self.remover(id_)
+        self.por_id[id_] = {
+            'id': id_,
+            'placa': linha['placa'],
+            'ativo': linha['ativo'],
+            'status': linha['status'],
+            'sequencial': linha['sequencial'],
+            'safra': linha['safra'],
+            'id_fornecedor': str(linha['id_fornecedor']),
+        }
+        self._indexar(self.por_placa, normalizar_placa(linha['placa']), id_)
+        self._indexar(self.por_ativo, linha['ativo'], id_)
+
+class VeiculoIndex:
+    """
+    Índice em memória dos veículos do banco principal para consultas rápidas (portões, QR-Code).
+
+    A cada consulta só o número da última alteração em `veiculos_alteracoes` é lido (uma busca
+    pela chave primária). Essa tabela é mantida por triggers em toda escrita em `veiculos`,
+    então o índice reflete alterações de qualquer worker ou comando: quando o número muda,
+    apenas os veículos alterados desde a última leitura são relidos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estados = {}  # DATABASE_PATH -> _Estado
+
+    def _carregar(self, connection, seq):
+        estado = _Estado(seq)
+        for linha in connection.execute(f"SELECT {_COLUNAS} FROM veiculos"):
+            estado.adicionar(linha)
+        logger.info(f"Índice de veículos carregado ({len(estado.por_id)} registros, alteração {seq}).")
+        return estado
+
+    def _atualizar(self, connection, estado, seq):
+        """Aplica as alterações após `estado.seq`; retorna False se elas já foram descartadas do registro."""
+        primeiro = connection.execute("SELECT MIN(seq) FROM veiculos_alteracoes").fetchone()[0]
+        if primeiro is None or primeiro > estado.seq + 1 or seq - estado.seq > RECARGA_COMPLETA:
+            return False
+        ids = [row[0] for row in connection.execute(
+            "SELECT DISTINCT veiculo_id FROM veiculos_alteracoes WHERE seq > ? AND seq <= ?", (estado.seq, seq))]
+        encontrados = {}
+        for inicio in range(0, len(ids), 500):
+            bloco = ids[inicio:inicio + 500]
+            encontrados.update((linha['id'], linha) for linha in connection.execute(
+                f"SELECT {_COLUNAS} FROM veiculos WHERE id IN ({', '.join('?' * len(bloco))})", bloco))
+        for id_ in ids:
+            if id_ in encontrados:
+                estado.adicionar(encontrados[id_])
+            else:
+                estado.remover(str(id_))
+        estado.seq = seq
+        return True
+
+    def _estado(self):
+        db_path = current_app.config['DATABASE_PATH']
+        connection = get_db_connection()
+        seq = connection.execute("SELECT MAX(seq) FROM veiculos_alteracoes").fetchone()[0] or 0
+        estado = self._estados.get(db_path)
+        if estado is not None and estado.seq == seq:
+            return estado
+        with self._lock:
+            estado = self._estados.get(db_path)
+            if estado is None or not self._atualizar(connection, estado, seq):
+                estado = self._estados[db_path] = self._carregar(connection, seq)
+        return estado
+
+    def buscar(self, id=None, placa=None, ativo=None):
+        """
+        Veículos que atendem a todos os critérios informados, do mais recente para o mais antigo.
+
+        Returns:
+            list: Dicionários com id, placa, ativo, status, sequencial, safra e fornecedor.
+        """
+        estado = self._estado()
+        candidatos = None
+        for indice, chave in ((None, id), (estado.por_placa, normalizar_placa(placa)), (estado.por_ativo, ativo)):
+            if not chave:
+                continue
+            ids = {chave} if indice is None else set(indice.get(chave, ()))
+            candidatos = ids if candidatos is None else candidatos & ids
+        resultado = []
+        for id_ in sorted(candidatos or (), reverse=True):
+            registro = estado.por_id.get(id_)
+            if registro is None:
+                continue
+            fornecedor = fornecedor_cache.obter(registro['id_fornecedor'])
+            resultado.append({
+                'id': registro['id'],
+                'placa': registro['placa'],
+                'ativo': registro['ativo'],
+                'status': registro['status'],
+                'sequencial': registro['sequencial'],
+                'safra': registro['safra'],
+                'fornecedor': fornecedor.nome if fornecedor else None,
+            })
+        return resultado
+
+    def invalidar(self):
+        """Descarta os índices deste processo (recarregados na próxima consulta)."""
+        with self._lock:
+            self._estados.clear()
+
+veiculo_index = VeiculoIndex()
@@ -1,24 +1,175 @@
 # app/utils/logger.py
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from flask import g, has_request_context, request
+
+# Os módulos chamam setup_logger() na importação, antes da aplicação existir: os padrões vêm
+# do ambiente e `init_logging(app)` os substitui pelos valores de app.config
+PADROES = {
+    'LOG_PATH': os.getenv("LOG_PATH", "idcolheita.log"),
+    'LOG_LEVEL': os.getenv("LOG_LEVEL", "INFO"),
+    'LOG_FORMATO': os.getenv("LOG_FORMATO", "json"),
+    'LOG_DEBUG_POR_SEGUNDO': int(os.getenv("LOG_DEBUG_POR_SEGUNDO", 10)),
+}
+
+_fila = queue.SimpleQueue()
+_lock = threading.Lock()
+_estado = {'listener': None, 'pid': None, 'config': dict(PADROES)}
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com o ID da requisição quando houver."""
+
+    def format(self, record):
+        dados = {
+            'ts': f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            'nivel': record.levelname,
+            'msg': record.getMessage(),
+            'origem': f"{record.module}:{record.lineno}",
+            'processo': record.process,
+            'thread': record.threadName,
+        }
+        if getattr(record, 'request_id', None):
+            dados['request_id'] = record.request_id
+        if getattr(record, 'suprimidos', 0):
+            dados['suprimidos'] = record.suprimidos
+        if record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False)
+
+class _LimiteDebug(logging.Filter):
+    """
+    Limita os registros DEBUG a `por_segundo` por linha de código; os descartados são
+    contados e informados no próximo registro aceito da mesma linha (campo `suprimidos`).
+    """
+
+    def __init__(self, por_segundo):
+        super().__init__()
+        self.por_segundo = por_segundo
+        self._janelas = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.por_segundo <= 0:
+            return True
+        chave = (record.pathname, record.lineno)
+        segundo = int(time.monotonic())
+        with self._lock:
+            janela = self._janelas.get(chave)
+            if janela is None or janela[0] != segundo:
+                suprimidos = janela[2] if janela else 0
+                self._janelas[chave] = [segundo, 1, 0]
+                record.suprimidos = suprimidos
+                return True
+            if janela[1] < self.por_segundo:
+                janela[1] += 1
+                record.suprimidos, janela[2] = janela[2], 0
+                return True
+            janela[2] += 1
+            return False
+
+class _QueueHandler(QueueHandler):
+    """
+    Enfileira o registro para a thread de escrita (a requisição não espera pelo disco).
+
+    O ID da requisição é lido aqui, na thread que registrou; a exceção é formatada já em
+    texto, porque o traceback não pode atravessar a fila.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if _estado['pid'] != os.getpid():
+            _iniciar_listener()  # Primeiro registro do processo (ou de um worker após o fork)
+        if has_request_context():
+            record.request_id = g.get('request_id')
+        super().emit(record)
+
+def _criar_handler_arquivo(config):
+    caminho = config['LOG_PATH']
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    # Rotação: máximo 5MB, até 5 arquivos
+    handler = RotatingFileHandler(caminho, maxBytes=5 * 1024 * 1024, backupCount=5, encoding='utf-8')
+    if config['LOG_FORMATO'] == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"))
+    return handler
+
+def _iniciar_listener():
+    """(Re)inicia a thread que grava os registros da fila no arquivo."""
+    with _lock:
+        if _estado['pid'] == os.getpid() and _estado['listener'] is not None:
+            return
+        # Após um fork o listener herdado não tem thread: só é substituído
+        _estado['listener'] = QueueListener(_fila, _criar_handler_arquivo(_estado['config']),
+                                            respect_handler_level=False)
+        _estado['listener'].start()
+        _estado['pid'] = os.getpid()
+
+def _parar_listener():
+    """Grava o que ainda está na fila e encerra a thread de escrita."""
+    with _lock:
+        listener = _estado['listener']
+        if listener is not None and _estado['pid'] == os.getpid():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _estado['listener'] = _estado['pid'] = None
+
+atexit.register(_parar_listener)
 
 def setup_logger():
     """Configura o logger para a aplicação."""
     logger = logging.getLogger("IdColheita")
-    logger.setLevel(logging.INFO)
 
     # Evitar múltiplos handlers
     if not logger.handlers:
-        # Configurar handler para arquivo com rotação (máximo 5MB, até 5 arquivos)
-        log_handler = RotatingFileHandler(
-            "idcolheita.log", maxBytes=5 * 1024 * 1024, backupCount=5
-        )
-        log_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
-            )
-        )
-        logger.addHandler(log_handler)
-
-    return logger
\ No newline at end of file
+        logger.setLevel(_estado['config']['LOG_LEVEL'].upper())
+        logger.propagate = False
+        handler = _QueueHandler(_fila)
+        handler.addFilter(_LimiteDebug(_estado['config']['LOG_DEBUG_POR_SEGUNDO']))
+        logger.addHandler(handler)
+
+    return logger
+
+def init_logging(app):
+    """
+    Aplica LOG_PATH, LOG_LEVEL, LOG_FORMATO e LOG_DEBUG_POR_SEGUNDO de app.config e registra
+    o ID de cada requisição (cabeçalho X-Request-ID recebido ou um novo), devolvido na resposta.
+    """
+    config = {nome: app.config.get(nome, padrao) for nome, padrao in PADROES.items()}
+    logger = setup_logger()
+    if config != _estado['config']:
+        _parar_listener()
+        _estado['config'] = config
+        logger.setLevel(config['LOG_LEVEL'].upper())
+        for handler in logger.handlers:
+            for filtro in handler.filters:
+                if isinstance(filtro, _LimiteDebug):
+                    filtro.por_segundo = config['LOG_DEBUG_POR_SEGUNDO']
+
+    @app.before_request
+    def _atribuir_request_id():
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex[:16]
+
+    @app.after_request
+    def _devolver_request_id(response):
+        if g.get('request_id'):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
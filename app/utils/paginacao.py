@@ -0,0 +1,21 @@
+# app/utils/paginacao.py
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+def parametros_paginacao(args):
+    """
+    Extrai os parâmetros de paginação por cursor da query string.
+
+    Args:
+        args: `request.args` da requisição.
+
+    Returns:
+        dict: {'limite', 'cursor', 'ordem'} prontos para os métodos `listar_pagina` dos modelos.
+    """
+    try:
+        limite = int(args.get('limite', LIMITE_PADRAO))
+    except ValueError:
+        limite = LIMITE_PADRAO
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    ordem = 'asc' if args.get('ordem') == 'asc' else 'desc'
+    return {'limite': limite, 'cursor': args.get('cursor') or None, 'ordem': ordem}
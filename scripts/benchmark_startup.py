@@ -0,0 +1,63 @@
+# scripts/benchmark_startup.py
+"""
+Mede o tempo de inicialização da aplicação (importar `app` e executar `create_app`), como
+acontece a cada worker do Gunicorn ou comando `flask`.
+
+Cada medição roda em um processo Python novo, para incluir o custo real das importações.
+Uso:
+    python scripts/benchmark_startup.py [--repeticoes 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em cada processo filho: imprime os tempos e as bibliotecas pesadas já carregadas
+MEDICAO = """
+import sys, time
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+app.create_app({'DATABASE_PATH': sys.argv[1], 'UPLOAD_FOLDER': sys.argv[2]})
+criado = time.perf_counter()
+pesadas = [m for m in ('PIL.Image', 'qrcode', 'reportlab.pdfgen.canvas', 'openpyxl') if m in sys.modules]
+print(importado - inicio, criado - importado, ','.join(pesadas))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='idcolheita-bench-')
+    env = dict(os.environ)
+    for nome in ('OUTPUT_FOLDER', 'VEICULO_IMAGE_DIR', 'SHARE_IMAGE_DIR'):
+        env.setdefault(nome, pasta)
+    env.setdefault('SECRET_KEY', 'benchmark')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [RAIZ, env.get('PYTHONPATH')]))
+    env['MIGRAR_AO_INICIAR'] = '1'  # Só a primeira execução cria as tabelas
+    banco = os.path.join(pasta, 'bench.sqlite3')
+    uploads = os.path.join(pasta, 'uploads')
+
+    comando = [sys.executable, '-c', MEDICAO, banco, uploads]
+    subprocess.run(comando, cwd=pasta, env=env, check=True, capture_output=True)  # Aquecimento (cache de disco, .pyc)
+    importacoes, fabricas = [], []
+    pesadas = ''
+    for _ in range(args.repeticoes):
+        saida = subprocess.run(comando, cwd=pasta, env=env, check=True, capture_output=True, text=True).stdout
+        importacao, fabrica, pesadas = (saida.strip().split(' ') + [''])[:3]
+        importacoes.append(float(importacao) * 1000)
+        fabricas.append(float(fabrica) * 1000)
+
+    total = [i + f for i, f in zip(importacoes, fabricas)]
+    print(f"import app:   mediana {statistics.median(importacoes):7.1f} ms")
+    print(f"create_app(): mediana {statistics.median(fabricas):7.1f} ms")
+    print(f"total:        mediana {statistics.median(total):7.1f} ms  (mín. {min(total):.1f} ms, {args.repeticoes} execuções)")
+    print(f"bibliotecas de renderização carregadas na inicialização: {pesadas or 'nenhuma'}")
+
+if __name__ == '__main__':
+    main()
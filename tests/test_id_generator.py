@@ -0,0 +1,105 @@
+# tests/test_id_generator.py
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# A configuração exige estas variáveis (conferidas em create_app)
+for _var in ("OUTPUT_FOLDER", "VEICULO_IMAGE_DIR", "SHARE_IMAGE_DIR"):
+    os.environ.setdefault(_var, tempfile.gettempdir())
+os.environ.setdefault("SECRET_KEY", "teste")
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.gettempdir(), "idcolheita-testes.log"))
+
+import pytest
+from app import create_app
+from app.services.id_generator import generate_id, generate_ids
+
+DATA_FIXA = datetime(2025, 6, 1, 8, 30)
+
+
+def _criar_app(db_path):
+    return create_app({"TESTING": True, "DATABASE_PATH": db_path, "MIGRAR_AO_INICIAR": True})
+
+
+def _alocar_em_processo(db_path, quantidade):
+    app = _criar_app(db_path)
+    with app.app_context():
+        return [generate_id("veiculos", DATA_FIXA) for _ in range(quantidade)]
+
+
+@pytest.fixture
+def app(tmp_path):
+    return _criar_app(str(tmp_path / "app.sqlite3"))
+
+
+def test_ids_sequenciais_no_mesmo_minuto(app):
+    with app.app_context():
+        ids = [generate_id("fornecedores", DATA_FIXA) for _ in range(3)]
+    assert ids == ["202506010830000", "202506010830001", "202506010830002"]
+
+
+def test_continua_apos_ids_existentes(app):
+    conn = sqlite3.connect(app.config["DATABASE_PATH"])
+    conn.execute("INSERT INTO fornecedores (id, nome) VALUES ('202506010830041', 'Antigo')")
+    conn.commit()
+    conn.close()
+    with app.app_context():
+        assert generate_id("fornecedores", DATA_FIXA) == "202506010830042"
+
+
+def test_minuto_esgotado_avanca_para_o_minuto_seguinte(app):
+    with app.app_context():
+        generate_ids("veiculos", 1000, DATA_FIXA)
+        assert generate_id("veiculos", DATA_FIXA) == "202506010831000"
+
+
+def test_id_unico_apos_lote_de_mais_de_1000(app):
+    with app.app_context():
+        ids = generate_ids("veiculos", 2500, DATA_FIXA)
+        assert generate_id("veiculos", DATA_FIXA) == "202506010832500"
+        assert "202506010832500" not in ids
+
+
+def test_reserva_sem_cadastro_nao_repete_ids(app):
+    # Os IDs reservados pelo lote não chegaram a ser gravados em `veiculos`
+    with app.app_context():
+        ids = generate_ids("veiculos", 3000, DATA_FIXA)
+        novo = generate_id("veiculos", DATA_FIXA)
+    assert novo not in ids
+    assert novo == "202506010833000"
+
+
+def test_lote_avanca_para_o_minuto_seguinte(app):
+    with app.app_context():
+        ids = generate_ids("veiculos", 1500, DATA_FIXA)
+        assert len(set(ids)) == 1500
+        assert ids[999] == "202506010830999"
+        assert ids[1000] == "202506010831000"
+        assert generate_id("veiculos", datetime(2025, 6, 1, 8, 31)) == "202506010831500"
+
+
+def test_tabela_invalida(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            generate_id("veiculos; DROP TABLE veiculos")
+
+
+def test_concorrencia_threads_e_processos(app):
+    db_path = app.config["DATABASE_PATH"]
+
+    def alocar_em_thread(quantidade):
+        with app.app_context():
+            return [generate_id("veiculos", DATA_FIXA) for _ in range(quantidade)]
+
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Pool(4) as pool:
+        resultados_processos = pool.starmap_async(_alocar_em_processo, [(db_path, 50)] * 4)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ids = [i for lote in executor.map(alocar_em_thread, [25] * 8) for i in lote]
+        ids += [i for lote in resultados_processos.get(timeout=120) for i in lote]
+
+    assert len(ids) == 400
+    assert len(set(ids)) == 400
+    assert sorted(ids) == [f"202506010830{n:03d}" for n in range(400)]
@@ -0,0 +1,121 @@
+# tests/test_migracoes.py
+import os
+import sqlite3
+import tempfile
+
+# A configuração exige estas variáveis (conferidas em create_app)
+for _var in ("OUTPUT_FOLDER", "VEICULO_IMAGE_DIR", "SHARE_IMAGE_DIR"):
+    os.environ.setdefault(_var, tempfile.gettempdir())
+os.environ.setdefault("SECRET_KEY", "teste")
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.gettempdir(), "idcolheita-testes.log"))
+
+import pytest
+from app import create_app
+from app.models.database import get_db_connection, transacao_imediata
+from app.models.migracoes import SCHEMA_VERSION, schema_version
+from app.services.sequence_generator import allocate_sequencial
+
+# Schema criado pelo init_db antes do controle de versão (IDs em TEXT)
+SCHEMA_ORIGINAL = """
+    CREATE TABLE fornecedores (
+        id TEXT PRIMARY KEY,
+        nome TEXT NOT NULL,
+        pessoa_de_contato TEXT,
+        whatsapp TEXT
+    );
+    CREATE TABLE veiculos (
+        id TEXT PRIMARY KEY,
+        id_fornecedor TEXT NOT NULL,
+        placa TEXT NOT NULL,
+        ativo TEXT NOT NULL,
+        status TEXT NOT NULL CHECK(status IN ('ok', 'bloqueado', 'desligado')),
+        sequencial INTEGER NOT NULL,
+        foto1 TEXT,
+        foto2 TEXT,
+        FOREIGN KEY (id_fornecedor) REFERENCES fornecedores(id)
+    );
+"""
+
+
+def _banco_original(db_path, fornecedores, veiculos):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_ORIGINAL)
+    conn.executemany("INSERT INTO fornecedores (id, nome) VALUES (?, ?)", fornecedores)
+    conn.executemany("INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, foto1) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", veiculos)
+    conn.commit()
+    conn.close()
+
+
+def _migrar(db_path):
+    app = create_app({"TESTING": True, "DATABASE_PATH": db_path, "SAFRA": "2025/26"})
+    assert app.config["SCHEMA_DESATUALIZADO"]
+    return app, app.test_cli_runner().invoke(args=["migrar"])
+
+
+def test_migracao_de_banco_com_ids_em_texto(tmp_path):
+    db_path = str(tmp_path / "antigo.sqlite3")
+    _banco_original(db_path, [("202401010800000", "Fornecedor A"), ("202401010800001", "Fornecedor B")], [
+        ("202401020900000", "202401010800000", "ABC1234", "10", "ok", 1, "ABC1234_10_1.jpg"),
+        ("202401020900001", "202401010800001", "DEF5678", "11", "bloqueado", 2, None),
+        ("202401020900002", "202401010800000", "GHI9012", "12", "ok", 3, None),
+    ])
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM veiculos WHERE sequencial = 2")  # Lacuna na numeração
+    conn.commit()
+    conn.close()
+
+    app, resultado = _migrar(db_path)
+    assert resultado.exit_code == 0, resultado.output
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    assert conn.execute("SELECT id, typeof(id), id_fornecedor, typeof(id_fornecedor), safra, foto1 "
+                        "FROM veiculos ORDER BY id").fetchall() == [
+        (202401020900000, "integer", 202401010800000, "integer", "2025/26", "ABC1234_10_1.jpg"),
+        (202401020900002, "integer", 202401010800000, "integer", "2025/26", None),
+    ]
+    assert conn.execute("SELECT id, typeof(id) FROM fornecedores ORDER BY id").fetchall() == [
+        (202401010800000, "integer"), (202401010800001, "integer")]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    with pytest.raises(sqlite3.IntegrityError):  # Fornecedor inexistente
+        conn.execute("INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, safra) "
+                     "VALUES (202401020900009, 1, 'JKL3456', '13', 'ok', 4, '2025/26')")
+    with pytest.raises(sqlite3.IntegrityError):  # Placa única na safra
+        conn.execute("INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, safra) "
+                     "VALUES (202401020900009, 202401010800000, 'ABC1234', '13', 'ok', 4, '2025/26')")
+    conn.execute("INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, safra) "
+                 "VALUES (202401020900009, 202401010800000, 'ABC1234', '13', 'ok', 4, '2026/27')")
+    conn.rollback()
+    conn.close()
+
+    with app.app_context():
+        assert schema_version() == SCHEMA_VERSION
+        connection = get_db_connection()
+        with transacao_imediata(connection):
+            cursor = connection.cursor()
+            numeros = [allocate_sequencial(cursor) for _ in range(2)]
+            cursor.close()
+    assert numeros == [2, 4]  # A lacuna deixada pelo veículo removido é reaproveitada primeiro
+
+
+def test_migracao_recusa_ids_nao_numericos(tmp_path):
+    db_path = str(tmp_path / "antigo.sqlite3")
+    _banco_original(db_path, [("202401010800000", "Fornecedor A"), ("fornecedor-b", "Fornecedor B")], [])
+
+    app, resultado = _migrar(db_path)
+    assert resultado.exit_code != 0
+    assert "fornecedores.id tem valores não numéricos: fornecedor-b" in resultado.output
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT typeof(id) FROM fornecedores WHERE nome = 'Fornecedor B'").fetchone() == ("text",)
+    assert conn.execute("SELECT MAX(versao) FROM schema_version").fetchone() == (2,)
+    conn.close()
+
+
+def test_filtro_so_por_status_usa_indice(tmp_path):
+    app = create_app({"TESTING": True, "DATABASE_PATH": str(tmp_path / "app.sqlite3"), "MIGRAR_AO_INICIAR": True})
+    with app.app_context():
+        plano = get_db_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM veiculos v WHERE v.status = ? ORDER BY v.id", ("bloqueado",)).fetchall()
+    assert any("idx_veiculos_status_id" in linha[3] for linha in plano)
@@ -0,0 +1,180 @@
+# tests/test_veiculos.py
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+# A configuração exige estas variáveis (conferidas em create_app)
+for _var in ("OUTPUT_FOLDER", "VEICULO_IMAGE_DIR", "SHARE_IMAGE_DIR"):
+    os.environ.setdefault(_var, tempfile.gettempdir())
+os.environ.setdefault("SECRET_KEY", "teste")
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.gettempdir(), "idcolheita-testes.log"))
+
+import pytest
+from app import create_app
+from app.models.database import caminho_arquivo
+from app.services import bulk_import
+from app.services.bulk_import import import_veiculos
+from app.services.render_queue import render_queue
+from app.services.season_archive import archive_season, archived_seasons
+
+ID_FORNECEDOR = "202506010800000"
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"TESTING": True, "DATABASE_PATH": str(tmp_path / "app.sqlite3"),
+                      "MIGRAR_AO_INICIAR": True, "SEQUENCIAL_MAXIMO": 5, "SAFRA": "2025/26"})
+    conn = sqlite3.connect(app.config["DATABASE_PATH"])
+    conn.execute("INSERT INTO fornecedores (id, nome) VALUES (?, 'Fornecedor')", (ID_FORNECEDOR,))
+    conn.commit()
+    conn.close()
+    return app
+
+
+def _linhas(quantidade):
+    return [{"id_fornecedor": ID_FORNECEDOR, "placa": f"ABC{n:04d}", "ativo": str(n + 1), "status": "ok"}
+            for n in range(quantidade)]
+
+
+def _total_veiculos(app):
+    conn = sqlite3.connect(app.config["DATABASE_PATH"])
+    try:
+        return conn.execute("SELECT COUNT(*) FROM veiculos").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_importacao_acima_do_limite_de_sequenciais(app):
+    with app.app_context():
+        with pytest.raises(ValueError, match="restam apenas 5 número"):
+            import_veiculos(_linhas(6))
+        assert _total_veiculos(app) == 0
+
+        assert import_veiculos(_linhas(5))["inseridos"] == 5
+        with pytest.raises(ValueError, match="restam apenas 0 número"):
+            import_veiculos(_linhas(6)[5:])
+
+
+def test_impressao_em_lote_acima_do_limite(app):
+    app.config["IMPRESSAO_LOTE_MAXIMO"] = 2
+    with app.app_context():
+        import_veiculos(_linhas(3))
+    cliente = app.test_client()
+
+    resposta = cliente.get("/veiculos/imprimir-lote?safra=todas")
+    assert resposta.status_code == 302
+    with cliente.session_transaction() as sessao:
+        assert "o limite é de 2 etiquetas" in sessao["_flashes"][0][1]
+
+    conn = sqlite3.connect(app.config["DATABASE_PATH"])
+    ids = [str(row[0]) for row in conn.execute("SELECT id FROM veiculos ORDER BY id LIMIT 2")]
+    conn.close()
+    resposta = cliente.get(f"/veiculos/imprimir-lote?ids={','.join(ids)}")
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b"%PDF")
+
+
+def test_safras_arquivadas_atualizadas_a_cada_arquivamento(app):
+    with app.app_context():
+        for safra, linhas in (("2023/24", _linhas(1)), ("2024/25", _linhas(2)[1:])):
+            app.config["SAFRA"] = safra
+            import_veiculos(linhas)
+        app.config["SAFRA"] = "2025/26"
+
+        assert archived_seasons() == []
+        archive_season("2023/24")
+        assert archived_seasons() == ["2023/24"]
+        archive_season("2024/25")
+        assert archived_seasons() == ["2024/25", "2023/24"]
+
+
+def test_tarefa_de_worker_encerrado_volta_para_a_fila(app):
+    app.config["RENDER_ASSINCRONO"] = False
+    processo = subprocess.Popen([sys.executable, "-c", "pass"])
+    processo.wait()
+    with app.app_context():
+        import_veiculos(_linhas(1))
+    conn = sqlite3.connect(app.config["DATABASE_PATH"])
+    id_veiculo = str(conn.execute("SELECT id FROM veiculos").fetchone()[0])
+    conn.execute("INSERT INTO render_jobs (veiculo_id, tipo, status, dono) VALUES (?, 'pdf', 'executando', ?)",
+                 (id_veiculo, f"{socket.gethostname()}:{processo.pid}:abcd1234"))
+    conn.commit()
+    conn.close()
+
+    with app.app_context():
+        assert render_queue.status(id_veiculo)["pdf"]["status"] == "concluido"
+
+
+def test_impressao_em_lote_de_safra_arquivada(app):
+    with app.app_context():
+        app.config["SAFRA"] = "2024/25"
+        import_veiculos(_linhas(2))
+        app.config["SAFRA"] = "2025/26"
+        archive_season("2024/25")
+        conn = sqlite3.connect(caminho_arquivo())
+    ids = [str(row[0]) for row in conn.execute("SELECT id FROM veiculos ORDER BY id")]
+    conn.close()
+    cliente = app.test_client()
+
+    for consulta in ("safra=2024/25", f"ids={ids[0]}"):
+        resposta = cliente.get(f"/veiculos/imprimir-lote?{consulta}")
+        assert resposta.status_code == 200
+        assert resposta.data.startswith(b"%PDF")
+
+
+def test_importacao_com_placa_cadastrada_durante_a_validacao(app, monkeypatch):
+    original = bulk_import.transacao_imediata
+
+    def cadastrar_antes(connection):
+        # Outra requisição cadastra a mesma placa entre a validação e a transação da importação
+        conn = sqlite3.connect(app.config["DATABASE_PATH"])
+        conn.execute("INSERT INTO veiculos (id, id_fornecedor, placa, ativo, status, sequencial, safra) "
+                     "VALUES (202506010900000, ?, 'ABC0000', '9', 'ok', 5, '2025/26')", (ID_FORNECEDOR,))
+        conn.commit()
+        conn.close()
+        return original(connection)
+
+    monkeypatch.setattr(bulk_import, "transacao_imediata", cadastrar_antes)
+    with app.app_context():
+        resultado = import_veiculos(_linhas(2))
+    assert resultado["inseridos"] == 1
+    assert resultado["erros"] == [(2, "placa: ABC0000 já está cadastrada.")]
+
+
+def test_url_da_miniatura_muda_quando_a_foto_e_substituida(app, tmp_path):
+    from PIL import Image
+    from app.blueprints.veiculos.routes import url_miniatura
+
+    app.config.update(UPLOAD_FOLDER=str(tmp_path / "fotos"), THUMB_DIR=str(tmp_path / "miniaturas"))
+    os.makedirs(app.config["UPLOAD_FOLDER"])
+    foto = os.path.join(app.config["UPLOAD_FOLDER"], "ABC0000_1_1.jpg")
+    cliente = app.test_client()
+
+    Image.new("RGB", (400, 300), "red").save(foto)
+    with app.test_request_context():
+        url_antiga = url_miniatura("ABC0000_1_1.jpg")
+    assert "max-age" in cliente.get(url_antiga).headers["Cache-Control"]
+
+    Image.new("RGB", (300, 400), "blue").save(foto)
+    with app.test_request_context():
+        url_nova = url_miniatura("ABC0000_1_1.jpg")
+    assert url_nova != url_antiga
+    assert cliente.get(url_antiga).headers["Cache-Control"] == "no-cache"
+
+
+def test_regeneracao_forcada_nao_retoma_progresso_de_execucao_normal(app):
+    from app.services.bulk_regeneration import _chave_progresso, _gravar_progresso, regenerate_all
+
+    with app.app_context():
+        import_veiculos(_linhas(3))
+        conn = sqlite3.connect(app.config["DATABASE_PATH"])
+        ids = [str(row[0]) for row in conn.execute("SELECT id FROM veiculos ORDER BY id")]
+        conn.close()
+        # Execução normal interrompida após o segundo veículo
+        _gravar_progresso(_chave_progresso({}, ("pdf",), False), ids[1], 2)
+
+        assert regenerate_all(tipos=("pdf",), workers=1, forcar=True)["processados"] == 3
+        assert regenerate_all(tipos=("pdf",), workers=1)["processados"] == 1